@@ -15,7 +15,7 @@ python --version >nul 2>&1
 if errorlevel 1 (
     echo [ERROR] Python не знайдено!
     echo.
-    echo Будь ласка, встановіть Python 3.8+ з https://www.python.org/downloads/
+    echo Будь ласка, встановіть Python 3.10+ з https://www.python.org/downloads/
     echo Під час встановлення обов'язково відмітьте "Add Python to PATH"
     echo.
     pause
@@ -29,7 +29,7 @@ echo [SUCCESS] Python %PYTHON_VERSION% знайдено
 REM Check Python version (basic check for 3.x)
 echo %PYTHON_VERSION% | findstr /R "^3\." >nul
 if errorlevel 1 (
-    echo [ERROR] Потрібен Python 3.8 або новіший. Знайдено: %PYTHON_VERSION%
+    echo [ERROR] Потрібен Python 3.10 або новіший. Знайдено: %PYTHON_VERSION%
     pause
     exit /b 1
 )
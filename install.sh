@@ -31,7 +31,7 @@ print_error() {
     echo -e "${RED}[ERROR]${NC} $1"
 }
 
-# Check if Python 3.8+ is installed
+# Check if Python 3.10+ is installed
 check_python() {
     print_status "Перевірка версії Python..."
     
@@ -40,11 +40,11 @@ check_python() {
         PYTHON_MAJOR=$(echo $PYTHON_VERSION | cut -d'.' -f1)
         PYTHON_MINOR=$(echo $PYTHON_VERSION | cut -d'.' -f2)
         
-        if [ "$PYTHON_MAJOR" -eq 3 ] && [ "$PYTHON_MINOR" -ge 8 ]; then
+        if [ "$PYTHON_MAJOR" -eq 3 ] && [ "$PYTHON_MINOR" -ge 10 ]; then
             print_success "Python $PYTHON_VERSION знайдено"
             PYTHON_CMD="python3"
         else
-            print_error "Потрібен Python 3.8 або новіший. Знайдено: $PYTHON_VERSION"
+            print_error "Потрібен Python 3.10 або новіший. Знайдено: $PYTHON_VERSION"
             exit 1
         fi
     elif command -v python &> /dev/null; then
@@ -52,15 +52,15 @@ check_python() {
         PYTHON_MAJOR=$(echo $PYTHON_VERSION | cut -d'.' -f1)
         PYTHON_MINOR=$(echo $PYTHON_VERSION | cut -d'.' -f2)
         
-        if [ "$PYTHON_MAJOR" -eq 3 ] && [ "$PYTHON_MINOR" -ge 8 ]; then
+        if [ "$PYTHON_MAJOR" -eq 3 ] && [ "$PYTHON_MINOR" -ge 10 ]; then
             print_success "Python $PYTHON_VERSION знайдено"
             PYTHON_CMD="python"
         else
-            print_error "Потрібен Python 3.8 або новіший. Знайдено: $PYTHON_VERSION"
+            print_error "Потрібен Python 3.10 або новіший. Знайдено: $PYTHON_VERSION"
             exit 1
         fi
     else
-        print_error "Python не знайдено. Будь ласка, встановіть Python 3.8+"
+        print_error "Python не знайдено. Будь ласка, встановіть Python 3.10+"
         
         # Suggest installation commands for different systems
         if [[ "$OSTYPE" == "linux-gnu"* ]]; then
@@ -31,16 +31,16 @@ def print_colored(message, color='white'):
 
 
 def check_python():
-    """Check if Python 3.8+ is installed."""
+    """Check if Python 3.10+ is installed."""
     print_colored("🔍 Перевірка Python...", 'blue')
     
     try:
         version = sys.version_info
-        if version.major == 3 and version.minor >= 8:
+        if version.major == 3 and version.minor >= 10:
             print_colored(f"✅ Python {version.major}.{version.minor}.{version.micro} знайдено", 'green')
             return True
         else:
-            print_colored(f"❌ Потрібен Python 3.8+. Знайдено: {version.major}.{version.minor}", 'red')
+            print_colored(f"❌ Потрібен Python 3.10+. Знайдено: {version.major}.{version.minor}", 'red')
             return False
     except Exception as e:
         print_colored(f"❌ Помилка перевірки Python: {e}", 'red')
@@ -176,7 +176,7 @@ def main():
     
     # Check Python
     if not check_python():
-        print_colored("\n❌ Встановіть Python 3.8+ та спробуйте знову", 'red')
+        print_colored("\n❌ Встановіть Python 3.10+ та спробуйте знову", 'red')
         input("Натисніть Enter для виходу...")
         sys.exit(1)
     
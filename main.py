@@ -17,6 +17,12 @@ sys.path.insert(0, str(src_dir))
 
 from src.core import app
 
+# Optional faster event loop; the bot runs on the stdlib loop when uvloop isn't installed
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 
 def setup_logging():
     """Setup logging configuration."""
@@ -82,6 +88,9 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         pass
\ No newline at end of file
@@ -50,7 +50,8 @@ class ClaudeService:
         raise Exception("Max retries exceeded")
     
     async def process_outline(self, outline: str, target_length: int = 5000, 
-                            sonnet_prompt: str = "", progress_callback=None) -> str:
+                            sonnet_prompt: str = "", progress_callback=None,
+                            report_completion: bool = True) -> str:
         """Process outline into final text using Claude Sonnet 4."""
         
         user_prompt = f"""
@@ -78,7 +79,7 @@ class ClaudeService:
             
             generated_text = response.content[0].text
             
-            if progress_callback:
+            if progress_callback and report_completion:
                 await progress_callback("Text generation completed!")
             
             return generated_text
@@ -93,14 +94,21 @@ class ClaudeService:
                                         sonnet_prompt: str = "", progress_callback=None) -> str:
         """Process outline with iterative length control."""
         
-        # First attempt
-        result = await self.process_outline(outline, target_length, sonnet_prompt, progress_callback)
+        # First attempt; its completion message is sent below, once we know whether an adjustment follows
+        result = await self.process_outline(outline, target_length, sonnet_prompt, progress_callback,
+                                            report_completion=False)
         current_length = len(result)
         
         # If length is significantly different, try to adjust
-        if abs(current_length - target_length) > target_length * 0.3:  # 30% tolerance
-            if progress_callback:
+        needs_adjustment = abs(current_length - target_length) > target_length * 0.3  # 30% tolerance
+        if progress_callback:
+            # One update per stage boundary: the adjustment notice supersedes the completion notice
+            if needs_adjustment:
                 await progress_callback(f"Adjusting text length... Current: {current_length}, Target: {target_length}")
+            else:
+                await progress_callback("Text generation completed!")
+        
+        if needs_adjustment:
             
             adjustment_prompt = f"""
             Please adjust the following text to be approximately {target_length} characters.
@@ -3,7 +3,7 @@ Bot handlers, states, and Telegram-related functionality
 """
 
 from .states import ProcessingStates
-from .commands import commands_router, user_sessions
+from .commands import commands_router, user_sessions, UserSession
 from .file_handlers import file_handlers_router
 from .callbacks import callbacks_router
 from .template_handlers import template_router
@@ -23,6 +23,7 @@ __all__ = [
     'misc_router',
     'queue_router',
     'user_sessions',
+    'UserSession',
 
     'start_automated_generation',
     'process_with_automated_claude'
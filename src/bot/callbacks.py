@@ -23,7 +23,7 @@ async def skip_prompt(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text("⏩ Промт пропущено. Переходжу до генерації outline...")
     
     user_id = callback.from_user.id
-    user_sessions[user_id]["custom_prompt"] = ""
+    user_sessions[user_id].custom_prompt = ""
     
     await generate_outline(callback.message, state, user_id)
 
@@ -38,7 +38,7 @@ async def approve_outline(callback: CallbackQuery, state: FSMContext):
     
     # Set context for Sonnet prompt and show AI choice
     from .commands import user_sessions
-    user_sessions[user_id]["prompt_context"] = "sonnet_prompt"
+    user_sessions[user_id].prompt_context = "sonnet_prompt"
     
     from .template_handlers import show_ai_choice
     await show_ai_choice(callback.message, state, context="sonnet_prompt")
@@ -76,7 +76,7 @@ async def skip_sonnet_prompt(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text("⏩ Промт для Sonnet пропущено.")
     
     user_id = callback.from_user.id
-    user_sessions[user_id]["sonnet_prompt"] = ""
+    user_sessions[user_id].sonnet_prompt = ""
     
     await ask_volume_choice(callback.message, state, user_id)
 
@@ -89,7 +89,7 @@ async def handle_volume_choice(callback: CallbackQuery, state: FSMContext):
     user_id = callback.from_user.id
     volume = callback.data.split("_")[1]  # "15k", "30k", "40k", or "60k"
     
-    user_sessions[user_id]["target_volume"] = volume
+    user_sessions[user_id].target_volume = volume
     
     volume_mapping = {
         "15k": "15K символів",
@@ -101,7 +101,7 @@ async def handle_volume_choice(callback: CallbackQuery, state: FSMContext):
     await callback.message.edit_text(f"✅ Обрано обсяг: {volume_text}")
     
     # Automatically enable multithread mode
-    user_sessions[user_id]["multithread_mode"] = True
+    user_sessions[user_id].multithread_mode = True
     
     await start_automated_generation(callback.message, state, user_id)
 
@@ -128,14 +128,14 @@ async def select_short_story(callback: CallbackQuery, state: FSMContext):
     
     try:
         await progress_msg.edit_text(f"📄 Витягую текст з файлу: **{filename}**...")
-        text_content = await file_processor.extract_text_from_file(file_path)
+        text_content = await file_processor.extract_text_from_file(file_path, cache=True)
         
         if not text_content.strip():
             await progress_msg.edit_text("❌ Обраний файл порожній або не містить читабельного тексту.")
             return
         
-        user_sessions[user_id]["current_text"] = text_content
-        user_sessions[user_id]["filename"] = filename
+        user_sessions[user_id].current_text = text_content
+        user_sessions[user_id].filename = filename
         
         await progress_msg.edit_text(
             f"✅ **Обрано файл:** {filename}\n"
@@ -172,14 +172,14 @@ async def select_long_story(callback: CallbackQuery, state: FSMContext):
     
     try:
         await progress_msg.edit_text(f"📄 Витягую текст з файлу: **{filename}**...")
-        text_content = await file_processor.extract_text_from_file(file_path)
+        text_content = await file_processor.extract_text_from_file(file_path, cache=True)
         
         if not text_content.strip():
             await progress_msg.edit_text("❌ Обраний файл порожній або не містить читабельного тексту.")
             return
         
-        user_sessions[user_id]["current_text"] = text_content
-        user_sessions[user_id]["filename"] = filename
+        user_sessions[user_id].current_text = text_content
+        user_sessions[user_id].filename = filename
         
         await progress_msg.edit_text(
             f"✅ **Обрано файл:** {filename}\n"
@@ -1,4 +1,6 @@
 import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 from aiogram import Router
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters import Command
@@ -10,30 +12,40 @@ logger = logging.getLogger(__name__)
 # Command handlers router
 commands_router = Router()
 
+
+@dataclass(slots=True)
+class UserSession:
+    """Per-user bot session state."""
+    current_text: Optional[str] = None
+    filename: Optional[str] = None
+    outline: Optional[str] = None
+    custom_prompt: str = ""
+    sonnet_prompt: str = ""
+    target_volume: Optional[str] = None
+    multithread_mode: bool = False
+    attempt_count: int = 0  # Загальна кількість спроб (включаючи exceptions)
+    successful_attempts: int = 0  # Тільки успішні генерації (валідні + невалідні)
+    valid_responses: int = 0
+    invalid_responses: int = 0
+    progress_message: Optional[Message] = None
+    valid_files: List[Dict] = field(default_factory=list)
+    invalid_files: List[Dict] = field(default_factory=list)
+    prompt_context: str = "initial"
+    selected_ai_type: str = ""
+    selected_folder: Optional[str] = None
+    selected_template: Optional[Dict] = None
+    new_story_text: str = ""
+
+
 # User sessions storage
-user_sessions = {}
+user_sessions: Dict[int, UserSession] = {}
 
 
 @commands_router.message(Command("start"))
 async def start_command(message: Message, state: FSMContext):
     """Handle /start command."""
     user_id = message.from_user.id
-    user_sessions[user_id] = {
-        "current_text": None,
-        "outline": None,
-        "custom_prompt": "",
-        "sonnet_prompt": "",
-        "target_volume": None,
-        "multithread_mode": False,
-        "attempt_count": 0,  # Загальна кількість спроб (включаючи exceptions)
-        "successful_attempts": 0,  # Тільки успішні генерації (валідні + невалідні)
-        "valid_responses": 0,
-        "invalid_responses": 0,
-        "progress_message": None,
-        "valid_files": [],
-        "invalid_files": [],
-        "prompt_context": "initial"
-    }
+    user_sessions[user_id] = UserSession()
     
     welcome_text = """
 🤖 **AI Workflow Automation System v2.0**
@@ -140,7 +152,7 @@ async def cancel_command(message: Message, state: FSMContext):
         session = user_sessions[user_id]
         
         # Send invalid files if any exist before cancelling
-        if session.get("invalid_files"):
+        if session.invalid_files:
             from .processors import send_invalid_files
             await send_invalid_files(message, session)
         
@@ -148,11 +160,11 @@ async def cancel_command(message: Message, state: FSMContext):
         await message.answer(
             f"❌ **ГЕНЕРАЦІЯ СКАСОВАНА**\n\n"
             f"📊 **Статистика до моменту скасування:**\n"
-            f"• Загальна кількість спроб: {session.get('attempt_count', 0)}\n"
-            f"• Успішних генерацій: {session.get('successful_attempts', 0)}\n"
-            f"• Валідних відповідей: {session.get('valid_responses', 0)}\n"
-            f"• Невалідних відповідей: {session.get('invalid_responses', 0)}\n"
-            f"• Паузи в API: {session.get('attempt_count', 0) - session.get('successful_attempts', 0)}\n\n"
+            f"• Загальна кількість спроб: {session.attempt_count}\n"
+            f"• Успішних генерацій: {session.successful_attempts}\n"
+            f"• Валідних відповідей: {session.valid_responses}\n"
+            f"• Невалідних відповідей: {session.invalid_responses}\n"
+            f"• Паузи в API: {session.attempt_count - session.successful_attempts}\n\n"
             f"Використайте /start для нової генерації.",
             parse_mode="Markdown"
         )
@@ -177,14 +189,15 @@ async def status_command(message: Message, state: FSMContext):
     
     # Get all processing information
     user_projects = await project_queue.get_user_projects(user_id)
-    all_projects = list(project_queue.projects.values())
     
     # Build real-time status message
     status_info = "⚡ **СТАТУС ПАРАЛЕЛЬНОЇ ОБРОБКИ В РЕАЛЬНОМУ ЧАСІ**\n\n"
     
     # Get real-time processing statistics
     realtime_stats = project_queue.get_realtime_stats()
-    processing_projects = [p for p in all_projects if p.status == ProjectStatus.PROCESSING]
+    # Read the queue's own state collections instead of scanning every tracked project
+    processing_projects = sorted((project_queue.projects[pid] for pid in project_queue.processing),
+                                 key=lambda p: p.created_at)
     
     status_info += f"**🚀 Паралельна обробка Claude Sonnet 4:**\n"
     status_info += f"• 🔄 Активних потоків: **{realtime_stats['active_threads']}/{realtime_stats['max_concurrent']}**\n"
@@ -218,7 +231,7 @@ async def status_command(message: Message, state: FSMContext):
                 else:
                     last_attempt_info = f" (остання спроба {seconds_since_last/60:.1f}хв тому)"
             
-            status_info += f"**{i}.** `{project.project_id[-12:]}` {user_marker}\n"
+            status_info += f"**{i}.** `{project.short_id}` {user_marker}\n"
             status_info += f"   ⏱️ Активний: **{processing_minutes:.1f} хв**{last_attempt_info}\n"
             status_info += f"   📊 Обсяг: {project.target_volume.upper()}\n"
             status_info += f"   🎯 Поточна успішність: **{current_success_rate:.1f}%**\n"
@@ -226,13 +239,13 @@ async def status_command(message: Message, state: FSMContext):
             status_info += f"   ⚡ Швидкість: **{project.current_processing_speed:.1f}** спроб/хв\n\n"
     
     # Show waiting projects (if any)
-    queued_projects = [p for p in all_projects if p.status == ProjectStatus.QUEUED]
+    queued_projects = [project_queue.projects[pid] for pid in project_queue.queue]
     if queued_projects:
         status_info += f"**⏳ ОЧІКУЮТЬ ПОЧАТКУ ОБРОБКИ ({len(queued_projects)}):**\n\n"
         for i, project in enumerate(queued_projects[:3], 1):  # Show only first 3
             user_marker = "👤 (Ваш)" if project.user_id == user_id else "👥 (Інший користувач)"
             wait_time = (datetime.now() - project.created_at).total_seconds() / 60
-            status_info += f"**{i}.** `{project.project_id[-12:]}` {user_marker}\n"
+            status_info += f"**{i}.** `{project.short_id}` {user_marker}\n"
             status_info += f"   ⏰ Очікує: **{wait_time:.1f} хв**\n"
             status_info += f"   📊 Обсяг: {project.target_volume.upper()}\n\n"
         
@@ -242,21 +255,21 @@ async def status_command(message: Message, state: FSMContext):
     # Show user's personal session info if exists
     if user_id in user_sessions:
         session = user_sessions[user_id]
-        template_info = session.get('selected_template', {})
+        template_info = session.selected_template or {}
         template_name = template_info.get('filename', 'Не обрано')
         template_ai_type = template_info.get('ai_type', 'Не обрано')
         
         status_info += f"**👤 ВАША ПОТОЧНА СЕСІЯ:**\n\n"
         status_info += f"**Стан:** {current_state or 'Очікування'}\n"
-        status_info += f"**Файл завантажено:** {'✅' if session.get('current_text') else '❌'}\n"
-        status_info += f"**Outline готовий:** {'✅' if session.get('outline') else '❌'}\n"
+        status_info += f"**Файл завантажено:** {'✅' if session.current_text else '❌'}\n"
+        status_info += f"**Outline готовий:** {'✅' if session.outline else '❌'}\n"
         status_info += f"**Тип промту:** {template_ai_type.upper() if template_ai_type != 'Не обрано' else 'Власний/Не обрано'}\n"
         status_info += f"**Шаблон:** {template_name[:30]}{'...' if len(template_name) > 30 else ''}\n"
-        status_info += f"**Цільовий обсяг:** {session.get('target_volume', 'Не обрано')}\n"
+        status_info += f"**Цільовий обсяг:** {session.target_volume or 'Не обрано'}\n"
         
-        if session.get('attempt_count', 0) > 0:
-            status_info += f"**Статистика сесії:** {session.get('attempt_count', 0)} спроб, "
-            status_info += f"{session.get('valid_responses', 0)} валідних\n"
+        if session.attempt_count > 0:
+            status_info += f"**Статистика сесії:** {session.attempt_count} спроб, "
+            status_info += f"{session.valid_responses} валідних\n"
         
         status_info += "\n"
     
@@ -273,7 +286,7 @@ async def status_command(message: Message, state: FSMContext):
                 ProjectStatus.FAILED: "❌"
             }.get(project.status, "❓")
             
-            status_info += f"{status_emoji} **{i}.** `{project.project_id[-12:]}`"
+            status_info += f"{status_emoji} **{i}.** `{project.short_id}`"
             
             if project.status == ProjectStatus.PROCESSING:
                 processing_time = (datetime.now() - project.created_at).total_seconds() / 60
@@ -355,7 +368,7 @@ async def queue_command(message: Message):
                 ProjectStatus.FAILED: "❌"
             }.get(project.status, "❓")
             
-            queue_text += f"{status_emoji} **{i}.** `{project.project_id[-12:]}`\n"
+            queue_text += f"{status_emoji} **{i}.** `{project.short_id}`\n"
             queue_text += f"   📅 {project.created_at.strftime('%d.%m %H:%M:%S')}\n"
             queue_text += f"   📊 {project.target_volume.upper()}\n"
             queue_text += f"   🔄 Спроб: {project.attempt_count}"
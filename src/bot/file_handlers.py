@@ -32,7 +32,7 @@ async def handle_document(message: Message, state: FSMContext):
     
     file_extension = os.path.splitext(document.file_name)[1].lower()
     if file_extension not in SUPPORTED_FORMATS:
-        await message.answer(f"❌ Непідтримуваний формат файлу. Підтримувані формати: {', '.join(SUPPORTED_FORMATS)}")
+        await message.answer(f"❌ Непідтримуваний формат файлу. Підтримувані формати: {', '.join(sorted(SUPPORTED_FORMATS))}")
         return
     
     try:
@@ -52,8 +52,8 @@ async def handle_document(message: Message, state: FSMContext):
             await progress_msg.edit_text("❌ Файл порожній або не містить читабельного тексту.")
             return
         
-        user_sessions[user_id]["current_text"] = text_content
-        user_sessions[user_id]["filename"] = document.file_name
+        user_sessions[user_id].current_text = text_content
+        user_sessions[user_id].filename = document.file_name
         
         await progress_msg.edit_text(f"✅ Файл успішно оброблено!\n📊 Знайдено {len(text_content)} символів тексту.")
         
@@ -71,7 +71,7 @@ async def handle_custom_prompt(message: Message, state: FSMContext):
     user_id = message.from_user.id
     custom_prompt = message.text.strip()
     
-    user_sessions[user_id]["custom_prompt"] = custom_prompt
+    user_sessions[user_id].custom_prompt = custom_prompt
     
     await message.answer(f"✅ Промт збережено: {custom_prompt[:100]}...")
     await generate_outline(message, state, user_id)
@@ -109,7 +109,7 @@ async def handle_custom_prompt_file(message: Message, state: FSMContext):
             await progress_msg.edit_text("❌ Файл порожній або не містить читабельного тексту.")
             return
         
-        user_sessions[user_id]["custom_prompt"] = prompt_content.strip()
+        user_sessions[user_id].custom_prompt = prompt_content.strip()
         
         await progress_msg.edit_text(
             f"✅ Промт успішно завантажено з файлу!\n"
@@ -130,7 +130,7 @@ async def handle_sonnet_prompt(message: Message, state: FSMContext):
     user_id = message.from_user.id
     sonnet_prompt = message.text.strip()
     
-    user_sessions[user_id]["sonnet_prompt"] = sonnet_prompt
+    user_sessions[user_id].sonnet_prompt = sonnet_prompt
     
     await message.answer(f"✅ Промт для Sonnet збережено: {sonnet_prompt[:100]}...")
     await ask_volume_choice(message, state, user_id)
@@ -168,7 +168,7 @@ async def handle_sonnet_prompt_file(message: Message, state: FSMContext):
             await progress_msg.edit_text("❌ Файл порожній або не містить читабельного тексту.")
             return
         
-        user_sessions[user_id]["sonnet_prompt"] = prompt_content.strip()
+        user_sessions[user_id].sonnet_prompt = prompt_content.strip()
         
         await progress_msg.edit_text(
             f"✅ Промт для Sonnet успішно завантажено з файлу!\n"
@@ -187,18 +187,18 @@ async def generate_outline(message: Message, state: FSMContext, user_id: int):
     """Generate outline using GPT-4.1."""
     try:
         session = user_sessions[user_id]
-        text = session["current_text"]
-        custom_prompt = session["custom_prompt"]
+        text = session.current_text
+        custom_prompt = session.custom_prompt
         
         sample_content = ""
-        if "selected_template" in session and session["selected_template"]:
-            sample_content = session["selected_template"].get("sample_content", "")
+        if session.selected_template:
+            sample_content = session.selected_template.get("sample_content", "")
         
         progress_msg = await message.answer("🧠 Генерую outline за допомогою GPT-4.1...")
-        user_sessions[user_id]["progress_message"] = progress_msg
+        user_sessions[user_id].progress_message = progress_msg
         
         outline = await ai_orchestrator.gpt_service.generate_outline(text, custom_prompt, sample_content)
-        session["outline"] = outline
+        session.outline = outline
         
         await progress_msg.edit_text("✅ Outline успішно згенеровано!")
         
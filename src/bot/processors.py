@@ -6,7 +6,7 @@ from aiogram.types import Message, FSInputFile, InlineKeyboardMarkup, InlineKeyb
 from aiogram.fsm.context import FSMContext
 
 from .states import ProcessingStates
-from .commands import user_sessions
+from .commands import user_sessions, UserSession
 from src.ai_services import AIOrchestrator
 
 logger = logging.getLogger(__name__)
@@ -20,15 +20,15 @@ async def start_automated_generation(message: Message, state: FSMContext, user_i
     """Start the automated content generation process."""
     logger.info(f"🚀 Запуск автоматизованої генерації для користувача {user_id}")
     session = user_sessions[user_id]
-    volume = session["target_volume"]
-    multithread = session["multithread_mode"]
+    volume = session.target_volume
+    multithread = session.multithread_mode
     
     logger.info(f"📊 Параметри: обсяг={volume}, багатопотоковий={multithread}")
     
-    session["attempt_count"] = 0
-    session["successful_attempts"] = 0
-    session["valid_responses"] = 0
-    session["invalid_responses"] = 0
+    session.attempt_count = 0
+    session.successful_attempts = 0
+    session.valid_responses = 0
+    session.invalid_responses = 0
     
     volume_mapping = {
         "15k": "15K",
@@ -54,10 +54,10 @@ async def process_with_automated_claude(message: Message, state: FSMContext, use
     """Automated processing with Claude Sonnet 4 with length control and file management."""
     try:
         session = user_sessions[user_id]
-        outline = session["outline"]
-        sonnet_prompt = session.get("sonnet_prompt", "")
-        target_volume = session["target_volume"]
-        multithread_mode = session["multithread_mode"]
+        outline = session.outline
+        sonnet_prompt = session.sonnet_prompt
+        target_volume = session.target_volume
+        multithread_mode = session.multithread_mode
         
         await state.set_state(ProcessingStates.processing)
         
@@ -88,21 +88,21 @@ async def process_single_request_generation(message: Message, state: FSMContext,
                                          progress_msg: Message, min_length: int, max_length: int):
     """Single request generation process - one request at a time."""
     session = user_sessions[user_id]
-    outline = session["outline"]
-    sonnet_prompt = session.get("sonnet_prompt", "")
+    outline = session.outline
+    sonnet_prompt = session.sonnet_prompt
     
     found_valid = False
     max_attempts = 20  # Maximum attempts to prevent infinite loops
     
-    while not found_valid and session["attempt_count"] < max_attempts:
-        session["attempt_count"] += 1
+    while not found_valid and session.attempt_count < max_attempts:
+        session.attempt_count += 1
         
         try:
             await progress_msg.edit_text(
-                f"🔄 **Спроба {session['attempt_count']}/{max_attempts}**\n\n"
+                f"🔄 **Спроба {session.attempt_count}/{max_attempts}**\n\n"
                 f"📊 Цільовий діапазон: {min_length:,} - {max_length:,} символів\n"
-                f"✅ Валідних відповідей: {session['valid_responses']}\n"
-                f"❌ Невалідних відповідей: {session['invalid_responses']}"
+                f"✅ Валідних відповідей: {session.valid_responses}\n"
+                f"❌ Невалідних відповідей: {session.invalid_responses}"
             )
             
             result = await ai_orchestrator.claude_service.process_outline(
@@ -117,7 +117,7 @@ async def process_single_request_generation(message: Message, state: FSMContext,
                 await asyncio.sleep(1)  # Short delay before next attempt
             
         except Exception as e:
-            logger.error(f"Error in generation attempt {session['attempt_count']}: {e}")
+            logger.error(f"Error in generation attempt {session.attempt_count}: {e}")
             await asyncio.sleep(3)  # Delay on error
             continue
     
@@ -127,7 +127,7 @@ async def process_single_request_generation(message: Message, state: FSMContext,
 
 
 
-async def save_generation_result(result: str, session: dict, min_length: int, max_length: int, 
+async def save_generation_result(result: str, session: UserSession, min_length: int, max_length: int, 
                                progress_msg: Message) -> bool:
     """Save generation result and return whether it's valid."""
     char_count = len(result)
@@ -135,7 +135,7 @@ async def save_generation_result(result: str, session: dict, min_length: int, ma
     is_valid = min_length <= char_count <= max_length
     
     # Інкрементуємо лічильник успішних спроб (тільки для успішних генерацій)
-    session["successful_attempts"] += 1
+    session.successful_attempts += 1
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]  # Include milliseconds for uniqueness
     
@@ -143,30 +143,30 @@ async def save_generation_result(result: str, session: dict, min_length: int, ma
         "content": result,
         "char_count": char_count,
         "timestamp": timestamp,
-        "attempt": session['attempt_count'],
-        "successful_attempt": session['successful_attempts'],
+        "attempt": session.attempt_count,
+        "successful_attempt": session.successful_attempts,
         "min_length": min_length,
         "max_length": max_length
     }
     
     if is_valid:
-        session["valid_responses"] += 1
-        session["valid_files"].append(file_data)
+        session.valid_responses += 1
+        session.valid_files.append(file_data)
         folder = "валідних"
     else:
-        session["invalid_responses"] += 1
-        session["invalid_files"].append(file_data)
+        session.invalid_responses += 1
+        session.invalid_files.append(file_data)
         folder = "невалідних"
     
     status_emoji = "✅" if is_valid else "❌"
     status_text = "В ДІАПАЗОНІ" if is_valid else "ПОЗА ДІАПАЗОНОМ"
     
     await progress_msg.edit_text(
-        f"{status_emoji} **Спроба {session['attempt_count']}: {status_text}**\n\n"
+        f"{status_emoji} **Спроба {session.attempt_count}: {status_text}**\n\n"
         f"📊 Символів: {char_count:,} (ціль: {min_length:,}-{max_length:,})\n"
         f"📁 Збережено в пам'яті ({folder})\n"
-        f"✅ Валідних: {session['valid_responses']}\n"
-        f"❌ Невалідних: {session['invalid_responses']}\n\n"
+        f"✅ Валідних: {session.valid_responses}\n"
+        f"❌ Невалідних: {session.invalid_responses}\n\n"
         f"{'🎉 ПРОЦЕС ЗАВЕРШЕНО!' if is_valid else '⏳ Продовжую генерацію...'}"
     )
     
@@ -176,16 +176,16 @@ async def save_generation_result(result: str, session: dict, min_length: int, ma
 
 
 
-async def send_invalid_files(message: Message, session: dict):
+async def send_invalid_files(message: Message, session: UserSession):
     """Send all invalid files as separate files in one message to Telegram."""
-    if not session["invalid_files"]:
+    if not session.invalid_files:
         return
     
     temp_files = []
     input_files = []
     
     try:
-        for i, file_data in enumerate(session["invalid_files"], 1):
+        for i, file_data in enumerate(session.invalid_files, 1):
             header = f"""# НЕВАЛІДНА ВІДПОВІДЬ #{i}
 # Цільовий діапазон: {file_data['min_length']:,} - {file_data['max_length']:,}
 # Час генерації: {datetime.fromtimestamp(int(file_data['timestamp'][:10])).strftime('%Y-%m-%d %H:%M:%S')}
@@ -205,8 +205,8 @@ async def send_invalid_files(message: Message, session: dict):
             await message.answer_document(
                 input_files[0],
                 caption=f"❌ **НЕВАЛІДНА ВІДПОВІДЬ**\n\n"
-                       f"📊 Кількість символів: {session['invalid_files'][0]['char_count']:,}\n"
-                       f"📄 Спроба #{session['invalid_files'][0]['attempt']}",
+                       f"📊 Кількість символів: {session.invalid_files[0]['char_count']:,}\n"
+                       f"📄 Спроба #{session.invalid_files[0]['attempt']}",
                 parse_mode="Markdown"
             )
         else:
@@ -223,7 +223,7 @@ async def send_invalid_files(message: Message, session: dict):
                 for i, input_file in enumerate(batch_files):
                     if batch_num == 0 and i == 0:
                         caption_text = f"❌ **НЕВАЛІДНІ ВІДПОВІДІ**\n\n"
-                        caption_text += f"📊 Всього невалідних відповідей: {len(session['invalid_files'])}\n"
+                        caption_text += f"📊 Всього невалідних відповідей: {len(session.invalid_files)}\n"
                         if total_batches > 1:
                             caption_text += f"📦 Частина {batch_num + 1} з {total_batches}\n"
                         caption_text += f"📄 Кожна відповідь в окремому файлі"
@@ -255,15 +255,15 @@ async def send_invalid_files(message: Message, session: dict):
                 logger.error(f"Error removing temp file {temp_path}: {e}")
 
 
-async def finalize_generation(message: Message, session: dict, found_valid: bool, max_attempts: int):
+async def finalize_generation(message: Message, session: UserSession, found_valid: bool, max_attempts: int):
     """Finalize the generation process and send results to user."""
     from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
     
     user_id = message.chat.id
     
     if found_valid:
-        if session["valid_files"]:
-            latest_valid = session["valid_files"][-1]
+        if session.valid_files:
+            latest_valid = session.valid_files[-1]
             char_count = latest_valid["char_count"]
             
             temp_filename = f"final_result_{latest_valid['timestamp']}.txt"
@@ -277,11 +277,11 @@ async def finalize_generation(message: Message, session: dict, found_valid: bool
                 final_file,
                 caption=f"🎉 **АВТОМАТИЗОВАНА ГЕНЕРАЦІЯ ЗАВЕРШЕНА!**\n\n"
                        f"📊 **Статистика:**\n"
-                       f"• Загальна кількість спроб: {session['attempt_count']}\n"
-                       f"• Успішних генерацій: {session['successful_attempts']}\n"
-                       f"• Валідних відповідей: {session['valid_responses']}\n"
-                       f"• Невалідних відповідей: {session['invalid_responses']}\n"
-                       f"• Паузи в API: {session['attempt_count'] - session['successful_attempts']}\n"
+                       f"• Загальна кількість спроб: {session.attempt_count}\n"
+                       f"• Успішних генерацій: {session.successful_attempts}\n"
+                       f"• Валідних відповідей: {session.valid_responses}\n"
+                       f"• Невалідних відповідей: {session.invalid_responses}\n"
+                       f"• Паузи в API: {session.attempt_count - session.successful_attempts}\n"
                        f"• Фінальна довжина: {char_count:,} символів\n\n",
                 parse_mode="Markdown"
             )
@@ -295,11 +295,11 @@ async def finalize_generation(message: Message, session: dict, found_valid: bool
         await message.answer(
             f"⚠️ **Досягнуто максимум спроб ({max_attempts})**\n\n"
             f"📊 **Статистика:**\n"
-            f"• Загальна кількість спроб: {session['attempt_count']}\n"
-            f"• Успішних генерацій: {session['successful_attempts']}\n"
-            f"• Валідних відповідей: {session['valid_responses']}\n"
-            f"• Невалідних відповідей: {session['invalid_responses']}\n"
-            f"• Паузи в API: {session['attempt_count'] - session['successful_attempts']}\n\n",
+            f"• Загальна кількість спроб: {session.attempt_count}\n"
+            f"• Успішних генерацій: {session.successful_attempts}\n"
+            f"• Валідних відповідей: {session.valid_responses}\n"
+            f"• Невалідних відповідей: {session.invalid_responses}\n"
+            f"• Паузи в API: {session.attempt_count - session.successful_attempts}\n\n",
             parse_mode="Markdown"
         )
         
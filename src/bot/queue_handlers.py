@@ -31,7 +31,7 @@ async def start_new_processing_callback(callback: CallbackQuery, state: FSMConte
     session = user_sessions[user_id]
     
     # Check if we have required data
-    if not session.get("outline") or not session.get("target_volume"):
+    if not session.outline or not session.target_volume:
         await callback.message.answer(
             "❌ Недостатньо даних для нової обробки. Використайте /start для повного налаштування."
         )
@@ -101,7 +101,7 @@ async def load_random_story(message: Message, user_id: int, story_type: str):
         
         # Update session with new story
         session = user_sessions[user_id]
-        session["current_text"] = story_content
+        session.current_text = story_content
         
         await message.answer(
             f"📚 **Завантажено нову історію: {selected_file}**\n\n"
@@ -127,7 +127,7 @@ async def add_project_to_queue(message: Message, user_id: int):
         project_id = f"project_{user_id}_{int(datetime.now().timestamp())}"
         
         # Get volume settings
-        target_volume = session["target_volume"]
+        target_volume = session.target_volume
         if target_volume == "15k":
             min_length, max_length = 15000, 20000
         elif target_volume == "30k":
@@ -141,8 +141,8 @@ async def add_project_to_queue(message: Message, user_id: int):
         task = ProjectTask(
             project_id=project_id,
             user_id=user_id,
-            outline=session["outline"],
-            sonnet_prompt=session.get("sonnet_prompt", ""),
+            outline=session.outline,
+            sonnet_prompt=session.sonnet_prompt,
             target_volume=target_volume,
             min_length=min_length,
             max_length=max_length
@@ -203,7 +203,7 @@ async def view_queue_callback(callback: CallbackQuery):
             ProjectStatus.FAILED: "❌"
         }.get(project.status, "❓")
         
-        status_text += f"{status_emoji} **Проект {i}** (`{project.project_id[-12:]}`)\n"
+        status_text += f"{status_emoji} **Проект {i}** (`{project.short_id}`)\n"
         status_text += f"   📅 {project.created_at.strftime('%H:%M:%S')}\n"
         status_text += f"   📊 {project.target_volume.upper()}\n"
         status_text += f"   🔄 Спроб: {project.attempt_count}\n"
@@ -1,17 +1,19 @@
 import os
 import re
+import time
+import asyncio
 import logging
 import random
-from typing import List, Tuple, Optional
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Optional
 from pathlib import Path
-from datetime import datetime
 from aiogram import Router, F
-from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, FSInputFile
+from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery, BufferedInputFile
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import StateFilter
 
 from .states import ProcessingStates
-from .commands import user_sessions
+from .commands import user_sessions, UserSession
 from src.utils import FileProcessor
 
 logger = logging.getLogger(__name__)
@@ -20,32 +22,76 @@ template_router = Router()
 
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent
-GPT_TEMPLATES_DIR = str(PROJECT_ROOT / "gpt-prompt")
-CLAUDE_TEMPLATES_DIR = str(PROJECT_ROOT / "claude-prompt")
-SAMPLE_TEMPLATES_DIR = str(PROJECT_ROOT / "gpt-prompt" / "sample")
-SHORT_STORY_DIR = str(PROJECT_ROOT / "short-story")
-LONG_STORY_DIR = str(PROJECT_ROOT / "long-story")
+GPT_TEMPLATES_DIR = PROJECT_ROOT / "gpt-prompt"
+CLAUDE_TEMPLATES_DIR = PROJECT_ROOT / "claude-prompt"
+SAMPLE_TEMPLATES_DIR = GPT_TEMPLATES_DIR / "sample"
+SHORT_STORY_DIR = PROJECT_ROOT / "short-story"
+LONG_STORY_DIR = PROJECT_ROOT / "long-story"
 
 GPT_FOLDERS = ["15к", "30к", "40к", "60к"]
 
-logger.info(f"Template handler initialized with paths:")
-logger.info(f"  PROJECT_ROOT: {PROJECT_ROOT}")
-logger.info(f"  GPT_TEMPLATES_DIR: {GPT_TEMPLATES_DIR}")
-logger.info(f"  CLAUDE_TEMPLATES_DIR: {CLAUDE_TEMPLATES_DIR}")
-logger.info(f"  SHORT_STORY_DIR: {SHORT_STORY_DIR}")
-logger.info(f"  LONG_STORY_DIR: {LONG_STORY_DIR}")
-
-
-def get_template_files(directory: str) -> List[str]:
+# Folder paths and folder menu are the same for every user, so build them once
+_GPT_FOLDER_PATHS = {folder: GPT_TEMPLATES_DIR / folder for folder in GPT_FOLDERS}
+_GPT_FOLDER_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text=f"📁 {folder}", callback_data=f"gpt_folder_{folder}")]
+    for folder in GPT_FOLDERS
+] + [[InlineKeyboardButton(text="🔙 Назад", callback_data="back_to_ai_choice")]])
+
+_SAFE_NAME_RE = re.compile(r'[^\w\-_.]')
+_TEMPLATE_EXTS = frozenset({'.txt', '.docx'})
+# Header line of the INCLUDE IN STORY section, then the story text up to "Outline Length"
+_STORY_RE = re.compile(r'(INCLUDE IN STORY:[^\n]*\n)(.*?)(?=Outline Length|\Z)', re.DOTALL)
+
+# directory -> ((st_ino, st_mtime_ns), sorted template file names)
+_DIR_CACHE: Dict[Path, Tuple[Tuple[int, int], List[str]]] = {}
+
+# (filepath, st_mtime_ns, st_size) -> template text, least recently used first
+_TEMPLATE_CACHE: OrderedDict[Tuple[Path, int, int], str] = OrderedDict()
+_TEMPLATE_CACHE_MAX_ENTRIES = 128
+
+# (sample filename, sample content) pairs, loaded on first GPT template pick
+_SAMPLES: Optional[List[Tuple[str, str]]] = None
+_SAMPLES_LOCK = asyncio.Lock()
+
+if logger.isEnabledFor(logging.DEBUG):
+    logger.debug(f"Template handler initialized with paths:")
+    logger.debug(f"  PROJECT_ROOT: {PROJECT_ROOT}")
+    logger.debug(f"  GPT_TEMPLATES_DIR: {GPT_TEMPLATES_DIR}")
+    logger.debug(f"  CLAUDE_TEMPLATES_DIR: {CLAUDE_TEMPLATES_DIR}")
+    logger.debug(f"  SHORT_STORY_DIR: {SHORT_STORY_DIR}")
+    logger.debug(f"  LONG_STORY_DIR: {LONG_STORY_DIR}")
+
+
+def _list_template_dir(directory: Path) -> List[str]:
+    """List template files in directory, reusing the cached listing while the directory is unchanged."""
+    st = os.stat(directory)
+    key = (st.st_ino, st.st_mtime_ns)
+    cached = _DIR_CACHE.get(directory)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name = entry.name
+            dot = name.rfind('.')
+            if dot > 0 and name[dot:] in _TEMPLATE_EXTS and entry.is_file():
+                files.append(name)
+    files.sort()
+    _DIR_CACHE[directory] = (key, files)
+    return files
+
+
+def get_template_files(directory: Path) -> List[str]:
     """Get list of template files from directory."""
     try:
-        logger.info(f"Looking for template files in directory: {directory}")
-        if not os.path.exists(directory):
-            logger.warning(f"Template directory does not exist: {directory}")
-            return []
-        files = [f for f in os.listdir(directory) if f.endswith(('.txt', '.docx'))]
-        logger.info(f"Found {len(files)} template files in {directory}: {files}")
-        return sorted(files)
+        files = _list_template_dir(directory)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Found {len(files)} template files in {directory}: {files}")
+        return files
+    except FileNotFoundError:
+        logger.warning(f"Template directory does not exist: {directory}")
+        return []
     except Exception as e:
         logger.error(f"Error reading template directory {directory}: {e}")
         return []
@@ -54,74 +100,81 @@ def get_template_files(directory: str) -> List[str]:
 def get_sample_files() -> List[str]:
     """Get list of sample files from sample directory."""
     try:
-        logger.info(f"Looking for sample files in directory: {SAMPLE_TEMPLATES_DIR}")
-        if not os.path.exists(SAMPLE_TEMPLATES_DIR):
-            logger.warning(f"Sample directory does not exist: {SAMPLE_TEMPLATES_DIR}")
-            return []
-        files = [f for f in os.listdir(SAMPLE_TEMPLATES_DIR) if f.endswith(('.txt', '.docx'))]
-        logger.info(f"Found {len(files)} sample files: {files}")
+        files = _list_template_dir(SAMPLE_TEMPLATES_DIR)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Found {len(files)} sample files: {files}")
         return files
+    except FileNotFoundError:
+        logger.warning(f"Sample directory does not exist: {SAMPLE_TEMPLATES_DIR}")
+        return []
     except Exception as e:
         logger.error(f"Error reading sample directory {SAMPLE_TEMPLATES_DIR}: {e}")
         return []
 
 
+async def _ensure_samples_loaded() -> List[Tuple[str, str]]:
+    """Load all sample files into memory once and return them."""
+    global _SAMPLES
+    
+    if _SAMPLES is None:
+        async with _SAMPLES_LOCK:
+            if _SAMPLES is None:
+                samples = []
+                for sample_file in get_sample_files():
+                    sample_content = await read_template_file(SAMPLE_TEMPLATES_DIR, sample_file)
+                    if sample_content:
+                        samples.append((sample_file, sample_content))
+                    else:
+                        logger.error(f"Could not read sample file: {sample_file}")
+                
+                # Keep retrying on later picks until at least one sample is available
+                if not samples:
+                    return samples
+                _SAMPLES = samples
+    
+    return _SAMPLES
+
+
 async def select_random_sample() -> Optional[Tuple[str, str]]:
     """Select a random sample file and return its name and content."""
     try:
-        sample_files = get_sample_files()
-        if not sample_files:
+        samples = await _ensure_samples_loaded()
+        if not samples:
             logger.warning("No sample files found")
             return None
         
-        selected_file = random.choice(sample_files)
-        sample_content = await read_template_file(SAMPLE_TEMPLATES_DIR, selected_file)
-        
-        if sample_content:
-            logger.info(f"Selected random sample: {selected_file}")
-            return selected_file, sample_content
-        else:
-            logger.error(f"Could not read sample file: {selected_file}")
-            return None
+        selected_file, sample_content = random.choice(samples)
+        logger.debug(f"Selected random sample: {selected_file}")
+        return selected_file, sample_content
             
     except Exception as e:
         logger.error(f"Error selecting random sample: {e}")
         return None
 
 
-def create_story_txt_file(story_content: str, template_name: str, user_id: int) -> str:
-    """Create a .txt file with the complete story content."""
+async def read_template_file(directory: Path, filename: str) -> Optional[str]:
+    """Read template file content."""
     try:
-        output_dir = Path("generated_stories")
-        output_dir.mkdir(exist_ok=True)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_template_name = re.sub(r'[^\w\-_.]', '_', template_name)
-        filename = f"{safe_template_name}_{user_id}_{timestamp}.txt"
-        filepath = output_dir / filename
+        filepath = directory / filename
+        st = os.stat(filepath)
+        cache_key = (filepath, st.st_mtime_ns, st.st_size)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(story_content)
+        cached = _TEMPLATE_CACHE.get(cache_key)
+        if cached is not None:
+            _TEMPLATE_CACHE.move_to_end(cache_key)
+            return cached
         
-        logger.info(f"Created story file: {filepath}")
-        return str(filepath)
-        
-    except Exception as e:
-        logger.error(f"Error creating story file: {e}")
-        raise
-
-
-async def read_template_file(directory: str, filename: str) -> Optional[str]:
-    """Read template file content."""
-    try:
-        filepath = os.path.join(directory, filename)
-        file_extension = os.path.splitext(filename)[1].lower()
+        file_extension = filepath.suffix.lower()
         
         if file_extension == '.docx':
-            return await FileProcessor.extract_text_from_file(filepath)
+            content = await FileProcessor.extract_text_from_file(str(filepath))
         else:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                return f.read()
+            content = await asyncio.to_thread(filepath.read_text, encoding='utf-8')
+        
+        _TEMPLATE_CACHE[cache_key] = content
+        if len(_TEMPLATE_CACHE) > _TEMPLATE_CACHE_MAX_ENTRIES:
+            _TEMPLATE_CACHE.popitem(last=False)
+        return content
     except Exception as e:
         logger.error(f"Error reading template file {filepath}: {e}")
         return None
@@ -129,68 +182,89 @@ async def read_template_file(directory: str, filename: str) -> Optional[str]:
 
 def extract_template_name(filename: str) -> str:
     """Extract display name from template filename."""
-    name = filename.replace('.txt', '').replace('.docx', '').replace('_', ' ')
-    return name.title()
+    return filename.rsplit('.', 1)[0].replace('_', ' ').title()
+
+
+def _make_display_and_safe(filename: str) -> Tuple[str, str]:
+    """Return (display name, filesystem-safe name) for a template filename."""
+    stem = filename.rsplit('.', 1)[0]
+    return stem.replace('_', ' ').title(), _SAFE_NAME_RE.sub('_', stem)
 
 
-def has_include_story_section(template_content: str) -> bool:
-    """Check if template has INCLUDE IN STORY section."""
-    return "INCLUDE IN STORY:" in template_content
+def find_story_span(template_content: str) -> Optional[Tuple[int, int]]:
+    """Find (start, end) offsets of the story text in INCLUDE IN STORY section."""
+    match = _STORY_RE.search(template_content)
+    return match.span(2) if match else None
 
 
-def replace_story_in_template(template_content: str, new_story: str) -> str:
+def replace_story_in_template(template_content: str, new_story: str,
+                              story_span: Optional[Tuple[int, int]] = None) -> str:
     """Replace the story part in INCLUDE IN STORY section."""
-    if "INCLUDE IN STORY:" not in template_content:
-        return template_content
+    if story_span is None:
+        story_span = find_story_span(template_content)
+        if story_span is None:
+            return template_content
     
-    start_marker = "INCLUDE IN STORY:"
-    end_marker = "Outline Length"
-    
-    start_idx = template_content.find(start_marker)
-    if start_idx == -1:
-        return template_content
-    
-    line_end = template_content.find('\n', start_idx)
-    if line_end == -1:
-        return template_content
-    
-    end_idx = template_content.find(end_marker)
-    if end_idx == -1:
-        end_idx = len(template_content)
-    
-    before = template_content[:line_end + 1]
-    after = template_content[end_idx:]
-    
-    return before + "\n\n" + new_story + "\n\n\n" + after
+    start, end = story_span
+    return f"{template_content[:start]}\n\n{new_story}\n\n\n{template_content[end:]}"
 
 
-async def show_ai_choice(message: Message, state: FSMContext, context: str = "initial"):
-    """Show AI choice menu (GPT or Claude)."""
-    
-    if context == "sonnet_prompt":
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
+# Menu markup and texts are identical for every user, so build them once per context
+_AI_CHOICE = {
+    "sonnet_prompt": (
+        InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="🧠 Claude Шаблони", callback_data="ai_choice_claude")],
             [InlineKeyboardButton(text="✏️ Власний промт", callback_data="ai_choice_custom")]
-        ])
-        
-        text = (
-            "🎯 **Оберіть тип промту для Claude Sonnet:**\n\n"
-            "• **Claude Шаблони** - готові шаблони для Claude\n"
-            "• **Власний промт** - введіть власний текст промту\n\n"
-            "Що бажаєте використати?"
-        )
-    else:
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        ]),
+        "🎯 **Оберіть тип промту для Claude Sonnet:**\n\n"
+        "• **Claude Шаблони** - готові шаблони для Claude\n"
+        "• **Власний промт** - введіть власний текст промту\n\n"
+        "Що бажаєте використати?"
+    ),
+    "initial": (
+        InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="🤖 GPT Шаблони", callback_data="ai_choice_gpt")],
             [InlineKeyboardButton(text="✏️ Власний промт", callback_data="ai_choice_custom")]
-        ])
-        
-        text = (
-            "🎯 **Оберіть тип промту:**\n\n"
-            "• **GPT Шаблони** - готові шаблони для GPT з можливістю зміни історії\n"
-            "• **Власний промт** - введіть власний текст промту\n\n"
-            "Що бажаєте використати?"
-        )
+        ]),
+        "🎯 **Оберіть тип промту:**\n\n"
+        "• **GPT Шаблони** - готові шаблони для GPT з можливістю зміни історії\n"
+        "• **Власний промт** - введіть власний текст промту\n\n"
+        "Що бажаєте використати?"
+    ),
+}
+
+_CUSTOM_PROMPT = {
+    "sonnet_prompt": (
+        InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="⏩ Пропустити промт для Sonnet", callback_data="skip_sonnet_prompt")]
+        ]),
+        "✏️ **Введіть ваш власний промт для Claude Sonnet 4:**\n\n"
+        "Цей промт буде використаний для обробки outline через Claude Sonnet 4.\n\n"
+        "Наприклад: 'Зробити текст більш емоційним та детальним' або 'Додати діалоги між персонажами'\n\n"
+        "Ви можете:\n"
+        "• 💬 Написати промт повідомленням\n"
+        "• 📁 Завантажити файл .txt або .docx з промтом\n\n"
+        "Або натисніть 'Пропустити промт' для продовження без додаткових інструкцій.",
+        ProcessingStates.waiting_for_sonnet_prompt
+    ),
+    "initial": (
+        InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="⏩ Пропустити промт", callback_data="skip_prompt")]
+        ]),
+        "✏️ **Введіть ваш власний промт:**\n\n"
+        "Наприклад: 'Зробити текст більш формальним' або 'Додати більше деталей про персонажів'\n\n"
+        "Ви можете:\n"
+        "• 💬 Написати промт повідомленням\n"
+        "• 📁 Завантажити файл .txt або .docx з промтом\n\n"
+        "Або натисніть 'Пропустити промт' для продовження без додаткових інструкцій.",
+        ProcessingStates.waiting_for_prompt
+    ),
+}
+
+
+async def show_ai_choice(message: Message, state: FSMContext, context: str = "initial"):
+    """Show AI choice menu (GPT or Claude)."""
+    keyboard, text = _AI_CHOICE.get(context, _AI_CHOICE["initial"])
     
     await message.answer(
         text,
@@ -205,18 +279,8 @@ async def show_gpt_folder_choice(message: Message, state: FSMContext):
     """Show GPT folder choice menu."""
     user_id = message.from_user.id if hasattr(message, 'from_user') else message.chat.id
     
-    if user_id not in user_sessions:
-        user_sessions[user_id] = {}
-    user_sessions[user_id]["selected_ai_type"] = "gpt"
-    
-    keyboard_buttons = []
-    for folder in GPT_FOLDERS:
-        callback_data = f"gpt_folder_{folder}"
-        keyboard_buttons.append([InlineKeyboardButton(text=f"📁 {folder}", callback_data=callback_data)])
-    
-    keyboard_buttons.append([InlineKeyboardButton(text="🔙 Назад", callback_data="back_to_ai_choice")])
-    
-    keyboard = InlineKeyboardMarkup(inline_keyboard=keyboard_buttons)
+    session = user_sessions.setdefault(user_id, UserSession())
+    session.selected_ai_type = "gpt"
     
     await message.answer(
         "🤖 **GPT Шаблони**\n\n"
@@ -226,7 +290,7 @@ async def show_gpt_folder_choice(message: Message, state: FSMContext):
         "• **40к** - розширені історії\n"
         "• **60к** - довгі історії\n\n"
         "Яку папку бажаєте переглянути?",
-        reply_markup=keyboard,
+        reply_markup=_GPT_FOLDER_KB,
         parse_mode="Markdown"
     )
     
@@ -237,15 +301,14 @@ async def show_template_choice(message: Message, state: FSMContext, ai_type: str
     """Show template choice menu for selected AI type and folder."""
     user_id = message.from_user.id if hasattr(message, 'from_user') else message.chat.id
     
-    if user_id not in user_sessions:
-        user_sessions[user_id] = {}
-    user_sessions[user_id]["selected_ai_type"] = ai_type
+    session = user_sessions.setdefault(user_id, UserSession())
+    session.selected_ai_type = ai_type
     
     if ai_type == "gpt" and folder:
-        folder_path = os.path.join(GPT_TEMPLATES_DIR, folder)
+        folder_path = _GPT_FOLDER_PATHS.get(folder) or GPT_TEMPLATES_DIR / folder
         templates = get_template_files(folder_path)
         title = f"🤖 **GPT Шаблони - {folder}**"
-        user_sessions[user_id]["selected_folder"] = folder
+        session.selected_folder = folder
     elif ai_type == "gpt":
         # For GPT without folder (shouldn't happen with new system, but fallback)
         templates = get_template_files(GPT_TEMPLATES_DIR)
@@ -265,7 +328,8 @@ async def show_template_choice(message: Message, state: FSMContext, ai_type: str
     keyboard_buttons = []
     for template in templates:
         display_name = extract_template_name(template)
-        callback_data = f"template_{ai_type}_{folder}_{template}" if folder else f"template_{ai_type}_{template}"
+        # "|" can't clash with underscores in folder or file names; empty folder means none
+        callback_data = f"t|{ai_type}|{folder or ''}|{template}"
         keyboard_buttons.append([InlineKeyboardButton(text=display_name, callback_data=callback_data)])
     
     if ai_type == "gpt" and folder:
@@ -291,7 +355,7 @@ async def handle_template_selection(callback: CallbackQuery, state: FSMContext,
     user_id = callback.from_user.id
     
     if ai_type == "gpt" and folder:
-        directory = os.path.join(GPT_TEMPLATES_DIR, folder)
+        directory = _GPT_FOLDER_PATHS.get(folder) or GPT_TEMPLATES_DIR / folder
     elif ai_type == "gpt":
         directory = GPT_TEMPLATES_DIR
     else:
@@ -311,20 +375,23 @@ async def handle_template_selection(callback: CallbackQuery, state: FSMContext,
             selected_sample, sample_content = sample_result
             logger.info(f"Selected sample for user {user_id}: {selected_sample}")
     
-    user_sessions[user_id]["selected_template"] = {
+    story_span = find_story_span(template_content) if ai_type == "gpt" else None
+    
+    user_sessions[user_id].selected_template = {
         "ai_type": ai_type,
         "filename": template_filename,
         "folder": folder,
         "content": template_content,
         "original_content": template_content,
         "selected_sample": selected_sample,
-        "sample_content": sample_content
+        "sample_content": sample_content,
+        "story_span": story_span
     }
     
     display_name = extract_template_name(template_filename)
     await callback.answer()
     
-    if ai_type == "gpt" and has_include_story_section(template_content):
+    if story_span is not None:
         # GPT template with story section - ask if user wants to change it
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="✅ Так", callback_data="change_story_yes")],
@@ -368,11 +435,14 @@ async def replace_story_text(message: Message, state: FSMContext, new_story_text
     try:
         processing_msg = await message.answer("🔄 Замінюю текст в Include In Story...")
         
-        user_sessions[user_id]["new_story_text"] = new_story_text.strip()
+        user_sessions[user_id].new_story_text = new_story_text.strip()
         
-        template_info = user_sessions[user_id]["selected_template"]
-        updated_template = replace_story_in_template(template_info["content"], new_story_text.strip())
-        user_sessions[user_id]["selected_template"]["content"] = updated_template
+        template_info = user_sessions[user_id].selected_template
+        # Offsets were found once at selection time and always refer to the original template
+        updated_template = replace_story_in_template(
+            template_info["original_content"], new_story_text.strip(), template_info.get("story_span")
+        )
+        user_sessions[user_id].selected_template["content"] = updated_template
         
         await processing_msg.delete()
         
@@ -385,16 +455,20 @@ async def replace_story_text(message: Message, state: FSMContext, new_story_text
 
 async def show_final_template_confirmation(message: Message, state: FSMContext, user_id: int, story_text: str):
     """Show final template confirmation with new story text and send txt file."""
-    template_info = user_sessions[user_id]["selected_template"]
-    display_name = extract_template_name(template_info["filename"])
+    template_info = user_sessions[user_id].selected_template
+    display_name, safe_name = _make_display_and_safe(template_info["filename"])
     
     complete_story = template_info["content"]
     
     story_preview = story_text[:150] + "..." if len(story_text) > 150 else story_text
     
     try:
-        filepath = create_story_txt_file(complete_story, display_name, user_id)
-        document = FSInputFile(filepath)
+        # Upload straight from memory instead of round-tripping through disk
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
+        document = BufferedInputFile(
+            complete_story.encode('utf-8'),
+            filename=f"{safe_name}_{user_id}_{timestamp}.txt"
+        )
         
         await message.answer_document(
             document=document,
@@ -405,12 +479,6 @@ async def show_final_template_confirmation(message: Message, state: FSMContext,
             parse_mode="Markdown"
         )
         
-        try:
-            os.remove(filepath)
-            logger.info(f"Cleaned up temporary file: {filepath}")
-        except Exception as cleanup_error:
-            logger.warning(f"Could not clean up file {filepath}: {cleanup_error}")
-            
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text="✅ Так, підходить", callback_data="confirm_final_template")],
             [InlineKeyboardButton(text="🔄 Змінити текст історії", callback_data="change_story_text")],
@@ -457,13 +525,13 @@ async def show_final_template_confirmation(message: Message, state: FSMContext,
 
 async def finalize_template_selection(message: Message, state: FSMContext, user_id: int):
     """Finalize template selection and proceed to next step based on context."""
-    template_info = user_sessions[user_id]["selected_template"]
-    context = user_sessions[user_id].get("prompt_context", "initial")
+    template_info = user_sessions[user_id].selected_template
+    context = user_sessions[user_id].prompt_context
     
     display_name = extract_template_name(template_info["filename"])
     
     if context == "sonnet_prompt":
-        user_sessions[user_id]["sonnet_prompt"] = template_info["content"]
+        user_sessions[user_id].sonnet_prompt = template_info["content"]
         
         await message.answer(
             f"✅ **Claude шаблон готовий до використання!**\n\n"
@@ -476,7 +544,7 @@ async def finalize_template_selection(message: Message, state: FSMContext, user_
         from .file_handlers import ask_volume_choice
         await ask_volume_choice(message, state, user_id)
     else:
-        user_sessions[user_id]["custom_prompt"] = template_info["content"]
+        user_sessions[user_id].custom_prompt = template_info["content"]
         
         sample_info = ""
         if template_info.get("selected_sample"):
@@ -507,41 +575,15 @@ async def handle_ai_choice(callback: CallbackQuery, state: FSMContext):
     elif callback.data == "ai_choice_claude":
         await show_template_choice(callback.message, state, "claude")
     elif callback.data == "ai_choice_custom":
-        context = user_sessions[user_id].get("prompt_context", "initial")
+        context = user_sessions[user_id].prompt_context
+        keyboard, text, next_state = _CUSTOM_PROMPT.get(context, _CUSTOM_PROMPT["initial"])
         
-        if context == "sonnet_prompt":
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="⏩ Пропустити промт для Sonnet", callback_data="skip_sonnet_prompt")]
-            ])
-            
-            await callback.message.edit_text(
-                "✏️ **Введіть ваш власний промт для Claude Sonnet 4:**\n\n"
-                "Цей промт буде використаний для обробки outline через Claude Sonnet 4.\n\n"
-                "Наприклад: 'Зробити текст більш емоційним та детальним' або 'Додати діалоги між персонажами'\n\n"
-                "Ви можете:\n"
-                "• 💬 Написати промт повідомленням\n"
-                "• 📁 Завантажити файл .txt або .docx з промтом\n\n"
-                "Або натисніть 'Пропустити промт' для продовження без додаткових інструкцій.",
-                reply_markup=keyboard,
-                parse_mode="Markdown"
-            )
-            await state.set_state(ProcessingStates.waiting_for_sonnet_prompt)
-        else:
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [InlineKeyboardButton(text="⏩ Пропустити промт", callback_data="skip_prompt")]
-            ])
-            
-            await callback.message.edit_text(
-                "✏️ **Введіть ваш власний промт:**\n\n"
-                "Наприклад: 'Зробити текст більш формальним' або 'Додати більше деталей про персонажів'\n\n"
-                "Ви можете:\n"
-                "• 💬 Написати промт повідомленням\n"
-                "• 📁 Завантажити файл .txt або .docx з промтом\n\n"
-                "Або натисніть 'Пропустити промт' для продовження без додаткових інструкцій.",
-                reply_markup=keyboard,
-                parse_mode="Markdown"
-            )
-            await state.set_state(ProcessingStates.waiting_for_prompt)
+        await callback.message.edit_text(
+            text,
+            reply_markup=keyboard,
+            parse_mode="Markdown"
+        )
+        await state.set_state(next_state)
 
 
 @template_router.callback_query(StateFilter(ProcessingStates.waiting_for_gpt_folder_choice))
@@ -551,7 +593,7 @@ async def handle_gpt_folder_choice(callback: CallbackQuery, state: FSMContext):
     
     if callback.data == "back_to_ai_choice":
         user_id = callback.from_user.id
-        context = user_sessions[user_id].get("prompt_context", "initial")
+        context = user_sessions[user_id].prompt_context
         await show_ai_choice(callback.message, state, context=context)
         return
     
@@ -567,24 +609,16 @@ async def handle_template_choice(callback: CallbackQuery, state: FSMContext):
     
     if callback.data == "back_to_ai_choice":
         user_id = callback.from_user.id
-        context = user_sessions[user_id].get("prompt_context", "initial")
+        context = user_sessions[user_id].prompt_context
         await show_ai_choice(callback.message, state, context=context)
         return
     elif callback.data == "back_to_gpt_folders":
         await show_gpt_folder_choice(callback.message, state)
         return
     
-    if callback.data.startswith("template_"):
-        parts = callback.data.split("_")
-        if len(parts) >= 4:  # template_gpt_folder_filename
-            ai_type = parts[1]
-            folder = parts[2]
-            template_filename = "_".join(parts[3:])  # Handle filenames with underscores
-            await handle_template_selection(callback, state, ai_type, template_filename, folder)
-        elif len(parts) >= 3:  # template_claude_filename or old format
-            ai_type = parts[1]
-            template_filename = "_".join(parts[2:])  # Handle filenames with underscores
-            await handle_template_selection(callback, state, ai_type, template_filename)
+    if callback.data.startswith("t|"):
+        _, ai_type, folder, template_filename = callback.data.split("|", 3)
+        await handle_template_selection(callback, state, ai_type, template_filename, folder or None)
 
 
 @template_router.callback_query(StateFilter(ProcessingStates.waiting_for_story_change_confirmation))
@@ -615,7 +649,7 @@ async def handle_final_template_confirmation(callback: CallbackQuery, state: FSM
         await request_new_story_text(callback.message, state)
     elif callback.data == "cancel_template":
         await callback.message.edit_text("❌ Вибір шаблону скасовано.")
-        context = user_sessions[user_id].get("prompt_context", "initial")
+        context = user_sessions[user_id].prompt_context
         await show_ai_choice(callback.message, state, context=context)
 
 
@@ -638,7 +672,7 @@ async def skip_sonnet_prompt_template(callback: CallbackQuery, state: FSMContext
     await callback.message.edit_text("⏩ Промт для Sonnet пропущено.")
     
     user_id = callback.from_user.id
-    user_sessions[user_id]["sonnet_prompt"] = ""
+    user_sessions[user_id].sonnet_prompt = ""
     
     from .file_handlers import ask_volume_choice
     await ask_volume_choice(callback.message, state, user_id)
\ No newline at end of file
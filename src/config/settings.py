@@ -1,7 +1,10 @@
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+# Parse .env only once per process (child processes inherit the loaded environment)
+if not os.environ.get("_ENV_LOADED"):
+    load_dotenv()
+    os.environ["_ENV_LOADED"] = "1"
 
 # Bot configuration
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -10,12 +13,12 @@ ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 
 # File processing settings
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
-SUPPORTED_FORMATS = ['.txt', '.docx']
+SUPPORTED_FORMATS = frozenset({'.txt', '.docx'})
 
 # AI settings
 GPT_MODEL = "gpt-4.1"
 CLAUDE_MODEL = "claude-sonnet-4-20250514"
 
-required_vars = [TELEGRAM_BOT_TOKEN, OPENAI_API_KEY, ANTHROPIC_API_KEY]
-if not all(required_vars):
-    raise ValueError("Missing required environment variables. Check .env file.")
\ No newline at end of file
+for _name in ("TELEGRAM_BOT_TOKEN", "OPENAI_API_KEY", "ANTHROPIC_API_KEY"):
+    if not os.environ.get(_name):
+        raise ValueError(f"Missing required environment variable {_name}. Check .env file.")
\ No newline at end of file
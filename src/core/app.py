@@ -53,11 +53,12 @@ class TelegramApp:
         await project_queue.start_queue_processor()
         
         # Start notification service
-        await notification_service.start_notification_service()
+        await notification_service.start_notification_service(self.bot)
         
         await self.bot.delete_webhook(drop_pending_updates=True)
         
-        await self.dp.start_polling(self.bot)
+        # Long-poll getUpdates so an idle bot makes a request every 25s instead of every 10s
+        await self.dp.start_polling(self.bot, polling_timeout=25)
     
     async def stop(self):
         """Stop the bot gracefully."""
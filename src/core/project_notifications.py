@@ -1,28 +1,96 @@
 import asyncio
 import logging
-import os
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List, Optional
 
 from aiogram import Bot
-from aiogram.types import FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import BufferedInputFile, InputMediaDocument, InlineKeyboardMarkup, InlineKeyboardButton
 
 from .project_queue import project_queue, ProjectStatus
-from src.config.settings import TELEGRAM_BOT_TOKEN
 
 logger = logging.getLogger(__name__)
 
+# Completions for the same user within this window are sent as one digest
+_DIGEST_WINDOW_SECONDS = 2.0
+# Telegram allows at most 10 documents per media group
+_MEDIA_GROUP_SIZE = 10
+
+# Notification texts are rendered once per project with format_map and cached on the task
+_COMPLETED_CAPTION = (
+    "🎉 **ПРОЕКТ ЗАВЕРШЕНО!**\n\n"
+    "🆔 ID: `{short_id}`\n"
+    "📊 **Статистика:**\n"
+    "• Загальна кількість спроб: {attempt_count}\n"
+    "• Успішних генерацій: {successful_attempts}\n"
+    "• Валідних відповідей: {valid_responses}\n"
+    "• Невалідних відповідей: {invalid_responses}\n"
+    "• Фінальна довжина: {char_count:,} символів\n\n"
+    "⏱️ Час обробки: {elapsed:.1f} сек"
+)
+
+_FAILED_TEXT = (
+    "❌ **ПРОЕКТ НЕ ВДАВСЯ**\n\n"
+    "🆔 ID: `{short_id}`\n"
+    "📊 **Статистика:**\n"
+    "• Загальна кількість спроб: {attempt_count}\n"
+    "• Успішних генерацій: {successful_attempts}\n"
+    "• Валідних відповідей: {valid_responses}\n"
+    "• Невалідних відповідей: {invalid_responses}\n\n"
+    "❌ Помилка: {error_message}\n\n"
+    "⏱️ Час спроб: {elapsed:.1f} сек"
+)
+
+_COMPLETED_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="🚀 Запустити нову обробку", callback_data="start_new_processing")
+    ],
+    [
+        InlineKeyboardButton(text="📊 Переглянути чергу", callback_data="view_queue")
+    ]
+])
+
+_FAILED_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="🔄 Спробувати знову", callback_data="start_new_processing")
+    ],
+    [
+        InlineKeyboardButton(text="📊 Переглянути чергу", callback_data="view_queue")
+    ]
+])
+
+
+def _render_notification(project, template: str, **extra) -> str:
+    """Render a notification text for the project, reusing the cached render if present."""
+    if project.final_markdown is None:
+        project.final_markdown = template.format_map({
+            "short_id": project.short_id,
+            "attempt_count": project.attempt_count,
+            "successful_attempts": project.successful_attempts,
+            "valid_responses": project.valid_responses,
+            "invalid_responses": project.invalid_responses,
+            "error_message": project.error_message,
+            "elapsed": (datetime.now() - project.created_at).total_seconds(),
+            **extra
+        })
+    return project.final_markdown
+
 
 class ProjectNotificationService:
     """Service to notify users about completed projects."""
     
-    def __init__(self):
-        self.bot = Bot(token=TELEGRAM_BOT_TOKEN)
+    def __init__(self, bot: Optional[Bot] = None):
+        # Shares the application's Bot (and its HTTP session); set before starting the service
+        self.bot = bot
         self._notification_task = None
-        self._notified_projects = set()
+        # user_id -> completed projects waiting for the digest flush
+        self._pending_by_user: Dict[int, List] = {}
+        self._flush_tasks: Dict[int, asyncio.Task] = {}
     
-    async def start_notification_service(self):
+    async def start_notification_service(self, bot: Optional[Bot] = None):
         """Start the notification service."""
+        if bot is not None:
+            self.bot = bot
         if self._notification_task is None or self._notification_task.done():
             self._notification_task = asyncio.create_task(self._notification_loop())
             logger.info("Project notification service started")
@@ -36,34 +104,95 @@ class ProjectNotificationService:
             except asyncio.CancelledError:
                 pass
             logger.info("Project notification service stopped")
+        
+        # Flush tasks still in _flush_tasks are only sleeping out the window; cancel them and
+        # send their completions now so projects that just finished are still reported
+        for flush_task in self._flush_tasks.values():
+            flush_task.cancel()
+        self._flush_tasks.clear()
+        pending_by_user, self._pending_by_user = self._pending_by_user, {}
+        for user_id, projects in pending_by_user.items():
+            await self._send_completed(user_id, projects)
     
     async def _notification_loop(self):
-        """Main notification loop."""
+        """Main notification loop, woken by the queue whenever a project finishes."""
         while True:
             try:
-                await self._check_and_notify_completed_projects()
-                await asyncio.sleep(5)  # Check every 5 seconds
+                project_id = await project_queue._completion_queue.get()
+                project = project_queue.projects.get(project_id)
+                if project is None:
+                    continue
+                
+                if project.status == ProjectStatus.COMPLETED:
+                    self._queue_completed(project)
+                elif project.status == ProjectStatus.FAILED:
+                    await self._notify_project_failed(project)
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Error in notification loop: {e}")
-                await asyncio.sleep(10)
     
-    async def _check_and_notify_completed_projects(self):
-        """Check for completed projects and notify users."""
-        # Get all projects
-        for project_id, project in project_queue.projects.items():
-            if (project.status == ProjectStatus.COMPLETED and 
-                project_id not in self._notified_projects):
-                
-                await self._notify_project_completed(project)
-                self._notified_projects.add(project_id)
+    def _queue_completed(self, project):
+        """Hold a completed project briefly so back-to-back completions share one digest."""
+        self._pending_by_user.setdefault(project.user_id, []).append(project)
+        if project.user_id not in self._flush_tasks:
+            self._flush_tasks[project.user_id] = asyncio.create_task(
+                self._flush_after(project.user_id, _DIGEST_WINDOW_SECONDS)
+            )
+    
+    async def _flush_after(self, user_id: int, delay: float):
+        """Send the pending completions for a user after the coalescing window."""
+        await asyncio.sleep(delay)
+        self._flush_tasks.pop(user_id, None)
+        await self._send_completed(user_id, self._pending_by_user.pop(user_id, []))
+    
+    async def _send_completed(self, user_id: int, projects: List):
+        """Send one notification for a single completion, or a digest for several."""
+        if len(projects) == 1:
+            await self._notify_project_completed(projects[0])
+        elif projects:
+            await self._notify_projects_digest(user_id, projects)
+    
+    async def _notify_projects_digest(self, user_id: int, projects: List):
+        """Notify user about several completed projects with one summary and grouped result files."""
+        try:
+            lines = [f"🎉 **ЗАВЕРШЕНО ПРОЕКТІВ: {len(projects)}**\n"]
+            media = []
+            for project in projects:
+                if not project.valid_files:
+                    continue
+                latest_valid = project.valid_files[-1]
+                lines.append(
+                    f"• `{project.short_id}` - {latest_valid['char_count']:,} символів, "
+                    f"спроб: {project.attempt_count}"
+                )
+                media.append(InputMediaDocument(media=BufferedInputFile(
+                    latest_valid["content"].encode('utf-8'),
+                    filename=f"project_result_{project.project_id}_{latest_valid['timestamp']}.txt"
+                )))
             
-            elif (project.status == ProjectStatus.FAILED and 
-                  project_id not in self._notified_projects):
-                
-                await self._notify_project_failed(project)
-                self._notified_projects.add(project_id)
+            await self.bot.send_message(
+                chat_id=user_id,
+                text="\n".join(lines),
+                parse_mode="Markdown",
+                reply_markup=_COMPLETED_KB
+            )
+            
+            for i in range(0, len(media), _MEDIA_GROUP_SIZE):
+                group = media[i:i + _MEDIA_GROUP_SIZE]
+                if len(group) == 1:
+                    await self.bot.send_document(chat_id=user_id, document=group[0].media)
+                else:
+                    await self.bot.send_media_group(chat_id=user_id, media=group)
+            
+            for project in projects:
+                if project.invalid_files:
+                    await self._send_project_invalid_files(project)
+            
+            logger.info(f"Notified user {user_id} about {len(projects)} completed projects")
+            
+        except Exception as e:
+            logger.error(f"Error sending completion digest to user {user_id}: {e}")
     
     async def _notify_project_completed(self, project):
         """Notify user about completed project."""
@@ -72,44 +201,20 @@ class ProjectNotificationService:
                 latest_valid = project.valid_files[-1]
                 char_count = latest_valid["char_count"]
                 
-                # Create temporary file
-                temp_filename = f"project_result_{project.project_id}_{latest_valid['timestamp']}.txt"
-                temp_path = f"/tmp/{temp_filename}"
-                
-                with open(temp_path, 'w', encoding='utf-8') as f:
-                    f.write(latest_valid["content"])
-                
-                final_file = FSInputFile(temp_path)
-                
-                # Create keyboard for next actions
-                keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                    [
-                        InlineKeyboardButton(text="🚀 Запустити нову обробку", callback_data="start_new_processing")
-                    ],
-                    [
-                        InlineKeyboardButton(text="📊 Переглянути чергу", callback_data="view_queue")
-                    ]
-                ])
+                # Upload straight from memory, no temporary file needed
+                final_file = BufferedInputFile(
+                    latest_valid["content"].encode('utf-8'),
+                    filename=f"project_result_{project.project_id}_{latest_valid['timestamp']}.txt"
+                )
                 
                 await self.bot.send_document(
                     chat_id=project.user_id,
                     document=final_file,
-                    caption=f"🎉 **ПРОЕКТ ЗАВЕРШЕНО!**\n\n"
-                           f"🆔 ID: `{project.project_id[-12:]}`\n"
-                           f"📊 **Статистика:**\n"
-                           f"• Загальна кількість спроб: {project.attempt_count}\n"
-                           f"• Успішних генерацій: {project.successful_attempts}\n"
-                           f"• Валідних відповідей: {project.valid_responses}\n"
-                           f"• Невалідних відповідей: {project.invalid_responses}\n"
-                           f"• Фінальна довжина: {char_count:,} символів\n\n"
-                           f"⏱️ Час обробки: {(datetime.now() - project.created_at).total_seconds():.1f} сек",
+                    caption=_render_notification(project, _COMPLETED_CAPTION, char_count=char_count),
                     parse_mode="Markdown",
-                    reply_markup=keyboard
+                    reply_markup=_COMPLETED_KB
                 )
                 
-                # Clean up temp file
-                os.remove(temp_path)
-                
                 # Send invalid files if any
                 if project.invalid_files:
                     await self._send_project_invalid_files(project)
@@ -122,28 +227,11 @@ class ProjectNotificationService:
     async def _notify_project_failed(self, project):
         """Notify user about failed project."""
         try:
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [
-                    InlineKeyboardButton(text="🔄 Спробувати знову", callback_data="start_new_processing")
-                ],
-                [
-                    InlineKeyboardButton(text="📊 Переглянути чергу", callback_data="view_queue")
-                ]
-            ])
-            
             await self.bot.send_message(
                 chat_id=project.user_id,
-                text=f"❌ **ПРОЕКТ НЕ ВДАВСЯ**\n\n"
-                     f"🆔 ID: `{project.project_id[-12:]}`\n"
-                     f"📊 **Статистика:**\n"
-                     f"• Загальна кількість спроб: {project.attempt_count}\n"
-                     f"• Успішних генерацій: {project.successful_attempts}\n"
-                     f"• Валідних відповідей: {project.valid_responses}\n"
-                     f"• Невалідних відповідей: {project.invalid_responses}\n\n"
-                     f"❌ Помилка: {project.error_message}\n\n"
-                     f"⏱️ Час спроб: {(datetime.now() - project.created_at).total_seconds():.1f} сек",
+                text=_render_notification(project, _FAILED_TEXT),
                 parse_mode="Markdown",
-                reply_markup=keyboard
+                reply_markup=_FAILED_KB
             )
             
             # Send invalid files if any
@@ -161,57 +249,60 @@ class ProjectNotificationService:
             return
         
         try:
-            temp_files = []
+            short_id = project.short_id
+            documents = []
             
             for i, file_data in enumerate(project.invalid_files, 1):
-                header = f"""# НЕВАЛІДНА ВІДПОВІДЬ #{i} - ПРОЕКТ {project.project_id[-12:]}
+                header = f"""# НЕВАЛІДНА ВІДПОВІДЬ #{i} - ПРОЕКТ {short_id}
 # Цільовий діапазон: {file_data['min_length']:,} - {file_data['max_length']:,}
 # Час генерації: {datetime.fromtimestamp(int(file_data['timestamp'][:10])).strftime('%Y-%m-%d %H:%M:%S')}
 
 """
                 
-                temp_filename = f"invalid_{project.project_id}_{i}_{file_data['timestamp']}.txt"
-                temp_path = f"/tmp/{temp_filename}"
-                
-                with open(temp_path, 'w', encoding='utf-8') as f:
-                    f.write(header + file_data['content'])
-                
-                temp_files.append(temp_path)
+                documents.append(BufferedInputFile(
+                    (header + file_data['content']).encode('utf-8'),
+                    filename=f"invalid_{project.project_id}_{i}_{file_data['timestamp']}.txt"
+                ))
             
-            # Send files in batches
-            batch_size = 5
-            for i in range(0, len(temp_files), batch_size):
-                batch = temp_files[i:i+batch_size]
-                
-                if len(batch) == 1:
-                    await self.bot.send_document(
-                        chat_id=project.user_id,
-                        document=FSInputFile(batch[0]),
-                        caption=f"❌ **НЕВАЛІДНА ВІДПОВІДЬ** - Проект `{project.project_id[-12:]}`"
-                    )
+            # Up to 10 documents go out in one media group; the first one carries the group caption
+            groups = [documents[i:i + _MEDIA_GROUP_SIZE] for i in range(0, len(documents), _MEDIA_GROUP_SIZE)]
+            
+            async def send_group(part: int, group: List[BufferedInputFile]):
+                if len(group) == 1:
+                    caption = f"❌ **НЕВАЛІДНА ВІДПОВІДЬ** - Проект `{short_id}`"
                 else:
-                    # Send files individually instead of media group for better compatibility
-                    for j, file_path in enumerate(batch):
-                        if j == 0:
-                            await self.bot.send_document(
-                                chat_id=project.user_id,
-                                document=FSInputFile(file_path),
-                                caption=f"❌ **НЕВАЛІДНІ ВІДПОВІДІ** - Проект `{project.project_id[-12:]}` (частина {i//batch_size + 1})"
-                            )
-                        else:
-                            await self.bot.send_document(
-                                chat_id=project.user_id,
-                                document=FSInputFile(file_path)
-                            )
+                    caption = f"❌ **НЕВАЛІДНІ ВІДПОВІДІ** - Проект `{short_id}` (частина {part})"
                 
-                await asyncio.sleep(1)  # Delay between batches
+                async def send():
+                    # Media groups need at least two items, a single file goes as a document
+                    if len(group) == 1:
+                        await self.bot.send_document(
+                            chat_id=project.user_id,
+                            document=group[0],
+                            caption=caption
+                        )
+                    else:
+                        await self.bot.send_media_group(
+                            chat_id=project.user_id,
+                            media=[
+                                InputMediaDocument(media=document, caption=caption if i == 0 else None)
+                                for i, document in enumerate(group)
+                            ]
+                        )
+                
+                try:
+                    await send()
+                except TelegramRetryAfter as e:
+                    # Back off for this group, then retry it once
+                    await asyncio.sleep(e.retry_after)
+                    await send()
             
-            # Clean up temp files
-            for temp_path in temp_files:
+            # Sent one group at a time so the numbered parts arrive in order
+            for part, group in enumerate(groups, 1):
                 try:
-                    os.remove(temp_path)
+                    await send_group(part, group)
                 except Exception as e:
-                    logger.error(f"Error removing temp file {temp_path}: {e}")
+                    logger.error(f"Error sending invalid files group {part} for project {project.project_id}: {e}")
                     
         except Exception as e:
             logger.error(f"Error sending invalid files for project {project.project_id}: {e}")
@@ -1,7 +1,8 @@
 import asyncio
 import logging
+from collections import defaultdict, deque
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Deque, Dict, List, Optional, Set
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -15,7 +16,7 @@ class ProjectStatus(Enum):
     FAILED = "failed"
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class ProjectTask:
     """Represents a single project task in the queue."""
     project_id: str
@@ -39,6 +40,13 @@ class ProjectTask:
     last_attempt_at: Optional[datetime] = None
     total_processing_time: float = 0.0  # in seconds
     current_processing_speed: float = 0.0  # attempts per minute
+    # Rendered completion/failure notification, cached so resends skip the formatting work
+    final_markdown: Optional[str] = None
+    # Last 12 chars of project_id, as shown to users
+    short_id: str = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.short_id = self.project_id[-12:]
 
 
 class ProjectQueue:
@@ -47,37 +55,55 @@ class ProjectQueue:
     def __init__(self, max_concurrent_projects: int = 1):
         self.max_concurrent_projects = max_concurrent_projects
         self.projects: Dict[str, ProjectTask] = {}
-        self.queue: List[str] = []
-        self.processing: List[str] = []
-        self.completed: List[str] = []
-        self.failed: List[str] = []
+        self.queue: Deque[str] = deque()
+        self.processing: Set[str] = set()
+        self.completed: Set[str] = set()
+        self.failed: Set[str] = set()
+        # user_id -> that user's project IDs, so per-user lookups skip unrelated projects
+        self._by_user: Dict[int, Set[str]] = defaultdict(set)
         self._processing_lock = asyncio.Lock()
-        self._queue_processor_task = None
+        # Every queued project gets a worker right away; the semaphore caps how many run at once
+        self._slots = asyncio.Semaphore(max_concurrent_projects)
+        self._workers: Set[asyncio.Task] = set()
+        self._cleanup_task = None
+        # IDs of projects that just finished (completed or failed), consumed by the notification service
+        self._completion_queue: asyncio.Queue = asyncio.Queue()
         
     async def start_queue_processor(self):
-        """Start the queue processor task."""
-        if self._queue_processor_task is None or self._queue_processor_task.done():
-            self._queue_processor_task = asyncio.create_task(self._process_queue())
+        """Start the periodic cleanup task; projects are picked up by their own workers."""
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
             logger.info("Queue processor started")
     
     async def stop_queue_processor(self):
-        """Stop the queue processor task."""
-        if self._queue_processor_task and not self._queue_processor_task.done():
-            self._queue_processor_task.cancel()
+        """Stop the cleanup task and any running project workers."""
+        if self._workers:
+            workers = list(self._workers)
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._workers.clear()
+            logger.info("Queue processor stopped")
+        if self._cleanup_task and not self._cleanup_task.done():
+            self._cleanup_task.cancel()
             try:
-                await self._queue_processor_task
+                await self._cleanup_task
             except asyncio.CancelledError:
                 pass
-            logger.info("Queue processor stopped")
     
     async def add_project(self, task: ProjectTask) -> str:
         """Add a new project to the queue."""
         async with self._processing_lock:
             self.projects[task.project_id] = task
             self.queue.append(task.project_id)
+            self._by_user[task.user_id].add(task.project_id)
             logger.info(f"Added project {task.project_id} to queue. Queue size: {len(self.queue)}")
             
-            # Start queue processor if not running
+            worker = asyncio.create_task(self._run_next())
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+            
+            # Start cleanup task if not running
             await self.start_queue_processor()
             
             return task.project_id
@@ -88,66 +114,60 @@ class ProjectQueue:
     
     async def get_user_projects(self, user_id: int) -> List[ProjectTask]:
         """Get all projects for a specific user."""
-        return [task for task in self.projects.values() if task.user_id == user_id]
+        return [self.projects[pid] for pid in self._by_user.get(user_id, ())]
     
     async def remove_project(self, project_id: str) -> bool:
         """Remove a project from the queue and tracking."""
         async with self._processing_lock:
-            if project_id in self.projects:
-                # Remove from all lists
-                if project_id in self.queue:
-                    self.queue.remove(project_id)
-                if project_id in self.processing:
-                    self.processing.remove(project_id)
-                if project_id in self.completed:
-                    self.completed.remove(project_id)
-                if project_id in self.failed:
-                    self.failed.remove(project_id)
-                
-                # Remove from projects dict
-                del self.projects[project_id]
-                logger.info(f"Removed project {project_id}")
-                return True
-            return False
+            return self._remove_project_locked(project_id)
     
-    async def _process_queue(self):
-        """Main queue processing loop."""
-        logger.info("Queue processor started")
-        cleanup_counter = 0
-        
+    def _remove_project_locked(self, project_id: str) -> bool:
+        """Remove a project from the queue and tracking; caller must hold the processing lock."""
+        if project_id in self.projects:
+            # Remove from all lists; only still-queued projects need the linear deque scan
+            if self.projects[project_id].status == ProjectStatus.QUEUED:
+                self.queue.remove(project_id)
+            self.processing.discard(project_id)
+            self.completed.discard(project_id)
+            self.failed.discard(project_id)
+            
+            user_id = self.projects[project_id].user_id
+            user_project_ids = self._by_user.get(user_id)
+            if user_project_ids is not None:
+                user_project_ids.discard(project_id)
+                if not user_project_ids:
+                    del self._by_user[user_id]
+            
+            # Remove from projects dict
+            del self.projects[project_id]
+            logger.info(f"Removed project {project_id}")
+            return True
+        return False
+    
+    async def _run_next(self):
+        """Wait for a free slot, then process the oldest queued project (keeps FIFO order)."""
+        async with self._slots:
+            async with self._processing_lock:
+                # The project this worker was spawned for may have been removed meanwhile
+                if not self.queue:
+                    return
+                project_id = self.queue.popleft()
+                self.processing.add(project_id)
+                task = self.projects[project_id]
+                task.status = ProjectStatus.PROCESSING
+                task.started_processing_at = datetime.now()
+            
+            logger.info(f"Starting processing for project {project_id}")
+            await self._process_single_project(project_id)
+    
+    async def _cleanup_loop(self):
+        """Periodically clean up old projects (every 10 minutes)."""
         while True:
+            await asyncio.sleep(600)
             try:
-                async with self._processing_lock:
-                    # Move projects from queue to processing if we have capacity
-                    while (len(self.processing) < self.max_concurrent_projects and 
-                           len(self.queue) > 0):
-                        
-                        project_id = self.queue.pop(0)
-                        self.processing.append(project_id)
-                        task = self.projects[project_id]
-                        task.status = ProjectStatus.PROCESSING
-                        task.started_processing_at = datetime.now()
-                        
-                        logger.info(f"Starting processing for project {project_id}")
-                        
-                        # Start processing task
-                        asyncio.create_task(self._process_single_project(project_id))
-                
-                # Periodic cleanup (every 10 minutes)
-                cleanup_counter += 1
-                if cleanup_counter >= 600:  # 600 seconds = 10 minutes
-                    await self.cleanup_old_projects()
-                    cleanup_counter = 0
-                
-                # Wait a bit before checking again
-                await asyncio.sleep(1)
-                
-            except asyncio.CancelledError:
-                logger.info("Queue processor cancelled")
-                break
-            except Exception as e:
-                logger.error(f"Error in queue processor: {e}")
-                await asyncio.sleep(5)
+                await self.cleanup_old_projects()
+            except Exception:
+                logger.exception("Error cleaning up old projects")
     
     async def _process_single_project(self, project_id: str):
         """Process a single project."""
@@ -203,26 +223,27 @@ class ProjectQueue:
             
             # Mark as completed or failed
             async with self._processing_lock:
-                self.processing.remove(project_id)
+                self.processing.discard(project_id)
                 if found_valid:
                     task.status = ProjectStatus.COMPLETED
-                    self.completed.append(project_id)
+                    self.completed.add(project_id)
                     logger.info(f"Project {project_id} completed successfully")
                 else:
                     task.status = ProjectStatus.FAILED
                     task.error_message = f"Max attempts ({max_attempts}) reached without valid result"
-                    self.failed.append(project_id)
+                    self.failed.add(project_id)
                     logger.info(f"Project {project_id} failed after {max_attempts} attempts")
+                self._completion_queue.put_nowait(project_id)
                     
         except Exception as e:
             logger.error(f"Critical error processing project {project_id}: {e}")
             async with self._processing_lock:
-                if project_id in self.processing:
-                    self.processing.remove(project_id)
+                self.processing.discard(project_id)
                 task = self.projects[project_id]
                 task.status = ProjectStatus.FAILED
                 task.error_message = str(e)
-                self.failed.append(project_id)
+                self.failed.add(project_id)
+                self._completion_queue.put_nowait(project_id)
     
     async def _save_project_result(self, result: str, task: ProjectTask, min_length: int, max_length: int) -> bool:
         """Save project result and return whether it's valid."""
@@ -316,9 +337,9 @@ class ProjectQueue:
                     task.created_at < cutoff_time):
                     projects_to_remove.append(project_id)
             
-            # Remove old projects
+            # Remove old projects (already under the lock, so not via remove_project)
             for project_id in projects_to_remove:
-                await self.remove_project(project_id)
+                self._remove_project_locked(project_id)
                 logger.info(f"Cleaned up old project {project_id}")
             
             if projects_to_remove:
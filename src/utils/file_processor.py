@@ -1,53 +1,235 @@
+import io
+import mmap
 import os
-import aiofiles
-from docx import Document
-from typing import Optional
+import asyncio
+import zipfile
+from collections import OrderedDict
+from functools import lru_cache
+from lxml import etree
+from typing import Dict, List, Optional, Tuple
 import logging
 import random
+import secrets
+import tempfile
 
 logger = logging.getLogger(__name__)
 
+# Bound once so the per-call extension checks skip the os.path attribute lookups
+_splitext = os.path.splitext
+
+# Tried in order when decoding .txt files; latin-1 accepts any byte sequence
+_TXT_ENCODINGS = ('utf-8', 'cp1251', 'cp1252', 'latin-1')
+
+# .txt files smaller than this are read inline; the thread hop costs more than the read itself
+_INLINE_READ_MAX_BYTES = 64 * 1024
+# .txt files larger than this are decoded straight from an mmap instead of a bytes copy
+_MMAP_READ_MIN_BYTES = 1024 * 1024
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W_BODY = _W + 'body'
+_W_P = _W + 'p'
+_W_R = _W + 'r'
+_W_HYPERLINK = _W + 'hyperlink'
+# Run content elements and their text, matching python-docx Run.text
+_W_RUN_TEXT = {
+    _W + 'tab': '\t',
+    _W + 'ptab': '\t',
+    _W + 'cr': '\n',
+    _W + 'noBreakHyphen': '-',
+}
+
+
+def _docx_paragraph_text(paragraph) -> str:
+    """Text of a w:p element, following python-docx Paragraph.text rules."""
+    parts = []
+    for child in paragraph.iterchildren(_W_R, _W_HYPERLINK):
+        runs = child.iterchildren(_W_R) if child.tag == _W_HYPERLINK else (child,)
+        for run in runs:
+            for item in run:
+                tag = item.tag
+                if tag == _W + 't':
+                    parts.append(item.text or '')
+                elif tag == _W + 'br':
+                    # Only line breaks produce text; page and column breaks don't
+                    if item.get(_W + 'type', 'textWrapping') == 'textWrapping':
+                        parts.append('\n')
+                elif tag in _W_RUN_TEXT:
+                    parts.append(_W_RUN_TEXT[tag])
+    return ''.join(parts)
+
+
+def _stream_docx_text(file_path: str, max_chars: Optional[int] = None) -> str:
+    """Extract body paragraph text from a .docx by streaming word/document.xml, stopping after max_chars."""
+    # Accumulate into one buffer instead of a list of paragraph strings joined at the end
+    text_content = io.StringIO()
+    separator = ''
+    with zipfile.ZipFile(file_path) as archive, archive.open('word/document.xml') as source:
+        for _, paragraph in etree.iterparse(source, events=('end',), tag=_W_P):
+            parent = paragraph.getparent()
+            # Like Document.paragraphs, only top-level body paragraphs count (not tables)
+            if parent is not None and parent.tag == _W_BODY:
+                text = _docx_paragraph_text(paragraph).strip()
+                if text:
+                    text_content.write(separator)
+                    text_content.write(text)
+                    separator = '\n\n'
+                    # Stop parsing once the caller has as much text as it asked for
+                    if max_chars is not None and text_content.tell() >= max_chars:
+                        return text_content.getvalue()[:max_chars]
+                # Drop processed body elements so memory stays flat on large documents
+                paragraph.clear()
+                while paragraph.getprevious() is not None:
+                    del parent[0]
+    return text_content.getvalue()
+
+
+def _read_bytes_sync(file_path: str) -> bytes:
+    """Open, read and close a file in one blocking call (run via asyncio.to_thread)."""
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+
+def _decode_txt(buffer) -> str:
+    """Decode a bytes-like buffer with the first encoding from _TXT_ENCODINGS that fits."""
+    for encoding in _TXT_ENCODINGS:
+        try:
+            return str(buffer, encoding)
+        except UnicodeDecodeError:
+            continue
+
+
+def _read_txt_mmap_sync(file_path: str) -> str:
+    """Decode a large text file directly from a read-only mmap (run via asyncio.to_thread)."""
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return _decode_txt(mapped)
+
+
+def _write_text_sync(file_path: str, text: str) -> None:
+    """Atomically write a UTF-8 text file in one blocking call (run via asyncio.to_thread)."""
+    # Raw fd write: the payload is encoded once and skips the buffered text-writer layers
+    data = memoryview(text.encode('utf-8'))
+    # Written under a unique name next to the target, then renamed over it
+    temp_path = f"{file_path}.{secrets.token_hex(4)}.tmp"
+    # 0o666 masked by the umask, the same permissions open(..., 'w') gives
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        try:
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+        # Readers see either the old file or the complete new one, never a partial write
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+@lru_cache(maxsize=1024)
+def _validate_cached(file_path: str, mtime_ns: int, size: int, max_size: int) -> bool:
+    """Size and format check for one version of a file; mtime_ns and size key the cache."""
+    if size > max_size:
+        return False
+    
+    file_extension = _splitext(file_path)[1].lower()
+    from src.config.settings import SUPPORTED_FORMATS
+    return file_extension in SUPPORTED_FORMATS
+
+
+# (abs path, st_mtime_ns, st_size, max_chars) -> extracted text, least recently used first
+_extract_cache: "OrderedDict[Tuple[str, int, int, Optional[int]], str]" = OrderedDict()
+# Bounded by total cached characters rather than entry count, since texts vary widely in size
+_EXTRACT_CACHE_MAX_CHARS = 8_000_000
+_extract_cache_chars = 0
+
+
+# folder -> (st_mtime_ns, [(file_path, filename), ...]) of supported story files
+_story_file_cache: Dict[str, Tuple[int, List[Tuple[str, str]]]] = {}
+
 
 class FileProcessor:
     """Handles file processing for text extraction."""
     
     @staticmethod
-    async def extract_text_from_file(file_path: str) -> str:
-        """Extract text from uploaded file based on its extension."""
-        file_extension = os.path.splitext(file_path)[1].lower()
+    async def extract_text_from_file(file_path: str, max_chars: Optional[int] = None, *, cache: bool = False) -> str:
+        """Extract text from uploaded file based on its extension, optionally only the first max_chars.
+
+        Pass cache=True for files that are read repeatedly (e.g. bundled stories);
+        one-off uploads are deleted after extraction and should not be cached.
+        """
+        global _extract_cache_chars
+        # Checked before touching the file, so unsupported uploads fail without a stat
+        file_extension = _splitext(file_path)[1].lower()
+        from src.config.settings import SUPPORTED_FORMATS
+        if file_extension not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported file format: {file_extension}")
+        
+        # Unchanged files (same mtime and size) are served from the cache instead of re-parsed
+        cache_key = None
+        try:
+            stat_result = os.stat(file_path)
+        except OSError:
+            stat_result = None
+        if cache and stat_result is not None:
+            cache_key = (os.path.abspath(file_path), stat_result.st_mtime_ns, stat_result.st_size, max_chars)
+            cached = _extract_cache.get(cache_key)
+            if cached is not None:
+                _extract_cache.move_to_end(cache_key)
+                return cached
         
         if file_extension == '.txt':
-            return await FileProcessor._extract_from_txt(file_path)
+            text = await FileProcessor._extract_from_txt(
+                file_path, stat_result.st_size if stat_result is not None else None
+            )
+            if max_chars is not None:
+                text = text[:max_chars]
         elif file_extension == '.docx':
-            return await FileProcessor._extract_from_docx(file_path)
+            text = await FileProcessor._extract_from_docx(file_path, max_chars)
         else:
             raise ValueError(f"Unsupported file format: {file_extension}")
+        
+        if cache_key is not None and len(text) <= _EXTRACT_CACHE_MAX_CHARS:
+            # Concurrent misses on the same file may both store; don't count it twice
+            previous = _extract_cache.pop(cache_key, None)
+            if previous is not None:
+                _extract_cache_chars -= len(previous)
+            _extract_cache[cache_key] = text
+            _extract_cache_chars += len(text)
+            while _extract_cache_chars > _EXTRACT_CACHE_MAX_CHARS:
+                _extract_cache_chars -= len(_extract_cache.popitem(last=False)[1])
+        return text
     
     @staticmethod
-    async def _extract_from_txt(file_path: str) -> str:
-        """Extract text from .txt file."""
-        try:
-            async with aiofiles.open(file_path, 'r', encoding='utf-8') as file:
-                content = await file.read()
-            return content.strip()
-        except UnicodeDecodeError:
-            # Try with different encoding
-            async with aiofiles.open(file_path, 'r', encoding='cp1251') as file:
-                content = await file.read()
-            return content.strip()
+    async def extract_many(file_paths: List[str], concurrency: int = 8) -> List[str]:
+        """Extract text from several files concurrently, returning results in input order."""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def extract_one(file_path: str) -> str:
+            async with semaphore:
+                return await FileProcessor.extract_text_from_file(file_path)
+        
+        return await asyncio.gather(*(extract_one(file_path) for file_path in file_paths))
     
     @staticmethod
-    async def _extract_from_docx(file_path: str) -> str:
+    async def _extract_from_txt(file_path: str, size: Optional[int] = None) -> str:
+        """Extract text from .txt file; size, if the caller already has it, saves a stat."""
+        if size is None:
+            size = os.stat(file_path).st_size
+        
+        # Read the bytes once and try each encoding in memory instead of reopening the file
+        if size < _INLINE_READ_MAX_BYTES:
+            return _decode_txt(_read_bytes_sync(file_path)).strip()
+        if size < _MMAP_READ_MIN_BYTES:
+            raw = await asyncio.to_thread(_read_bytes_sync, file_path)
+            return _decode_txt(raw).strip()
+        return (await asyncio.to_thread(_read_txt_mmap_sync, file_path)).strip()
+    
+    @staticmethod
+    async def _extract_from_docx(file_path: str, max_chars: Optional[int] = None) -> str:
         """Extract text from .docx file."""
         try:
-            doc = Document(file_path)
-            text_content = []
-            
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text_content.append(paragraph.text.strip())
-            
-            return '\n\n'.join(text_content)
+            return await asyncio.to_thread(_stream_docx_text, file_path, max_chars)
         except Exception as e:
             logger.error(f"Error extracting text from DOCX: {e}")
             raise ValueError(f"Failed to process DOCX file: {str(e)}")
@@ -55,26 +237,21 @@ class FileProcessor:
     @staticmethod
     async def save_text_to_file(text: str, filename: str) -> str:
         """Save text content to file and return file path."""
-        file_path = f"/tmp/{filename}"
+        file_path = os.path.join(tempfile.gettempdir(), filename)
         
-        async with aiofiles.open(file_path, 'w', encoding='utf-8') as file:
-            await file.write(text)
+        await asyncio.to_thread(_write_text_sync, file_path, text)
         
         return file_path
     
     @staticmethod
     def validate_file(file_path: str, max_size: int) -> bool:
         """Validate file size and format."""
-        if not os.path.exists(file_path):
-            return False
-        
-        file_size = os.path.getsize(file_path)
-        if file_size > max_size:
+        try:
+            stat_result = os.stat(file_path)
+        except OSError:
             return False
         
-        file_extension = os.path.splitext(file_path)[1].lower()
-        from src.config.settings import SUPPORTED_FORMATS
-        return file_extension in SUPPORTED_FORMATS
+        return _validate_cached(file_path, stat_result.st_mtime_ns, stat_result.st_size, max_size)
     
     @staticmethod
     def get_random_story_file(story_type: str) -> Optional[tuple[str, str]]:
@@ -97,21 +274,31 @@ class FileProcessor:
             logger.error(f"Invalid story type: {story_type}. Must be 'short' or 'long'")
             return None
         
-        if not os.path.exists(folder_path):
+        try:
+            mtime = os.stat(folder_path).st_mtime_ns
+        except FileNotFoundError:
             logger.error(f"Story folder not found: {folder_path}")
             return None
         
-        # Get all supported files from the folder
-        from src.config.settings import SUPPORTED_FORMATS
-        story_files = []
-        
         try:
-            for filename in os.listdir(folder_path):
-                file_path = os.path.join(folder_path, filename)
-                if os.path.isfile(file_path):
-                    file_extension = os.path.splitext(filename)[1].lower()
-                    if file_extension in SUPPORTED_FORMATS:
-                        story_files.append((file_path, filename))
+            # Rescan only when the folder changed since the last call
+            folder_key = str(folder_path)
+            cached = _story_file_cache.get(folder_key)
+            if cached is not None and cached[0] == mtime:
+                story_files = cached[1]
+            else:
+                # Get all supported files from the folder
+                from src.config.settings import SUPPORTED_FORMATS
+                story_files = []
+                with os.scandir(folder_path) as entries:
+                    for entry in entries:
+                        # d_type answers is_file without a stat; symlinks are not followed
+                        if entry.is_file(follow_symlinks=False):
+                            name = entry.name
+                            dot = name.rfind('.')
+                            if dot > 0 and name[dot:].lower() in SUPPORTED_FORMATS:
+                                story_files.append((entry.path, name))
+                _story_file_cache[folder_key] = (mtime, story_files)
             
             if not story_files:
                 logger.warning(f"No supported files found in {folder_path}")
@@ -1,7 +1,7 @@
 import pytest
-import asyncio
 import os
 import sys
+from functools import _lru_cache_wrapper
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -9,13 +9,6 @@ test_dir = Path(__file__).parent
 src_dir = test_dir.parent / "src"
 sys.path.insert(0, str(src_dir))
 
-@pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
-
 @pytest.fixture(autouse=True)
 def mock_config():
     """Mock configuration to avoid loading real API keys during tests."""
@@ -25,21 +18,42 @@ def mock_config():
             OPENAI_API_KEY="test_openai_key",
             ANTHROPIC_API_KEY="test_anthropic_key",
             MAX_FILE_SIZE=10 * 1024 * 1024,
-            SUPPORTED_FORMATS=['.txt', '.docx'],
+            SUPPORTED_FORMATS=frozenset({'.txt', '.docx'}),
             GPT_MODEL="gpt-4.1",
             CLAUDE_MODEL="claude-3-5-sonnet-20241022"
         )
     }):
         yield
 
-@pytest.fixture
-def temp_dir(tmp_path):
-    """Provide a temporary directory for test files."""
-    return tmp_path
+def _iter_lru_caches():
+    """Yield lru_cache wrappers defined at module or class level in the loaded src modules."""
+    for name, module in list(sys.modules.items()):
+        if module is None or not (name == "src" or name.startswith("src.")):
+            continue
+        for obj in list(vars(module).values()):
+            if isinstance(obj, _lru_cache_wrapper):
+                yield obj
+            elif isinstance(obj, type) and obj.__module__ == name:
+                for attr in vars(obj).values():
+                    attr = getattr(attr, "__func__", attr)  # staticmethod / classmethod
+                    if isinstance(attr, _lru_cache_wrapper):
+                        yield attr
+
+@pytest.fixture(autouse=True)
+def clear_lru_caches():
+    """Clear lru_cache results after each test so values cached under mocks don't leak."""
+    yield
+    for cached in _iter_lru_caches():
+        cached.cache_clear()
+
+@pytest.fixture(scope="session")
+def temp_dir(tmp_path_factory):
+    """Provide a temporary directory for test files, shared by the session (use tmp_path for files a test modifies)."""
+    return tmp_path_factory.mktemp("session_tmp")
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_text():
-    """Provide sample text for testing."""
+    """Provide sample text for testing (shared by the whole session, do not modify)."""
     return """This is a sample crazy story for testing.
     
 It has multiple paragraphs with different content.
@@ -50,9 +64,9 @@ The story should be interesting enough to generate a good outline
 and then be processed into a final text by the AI services.
 """
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_outline():
-    """Provide sample outline for testing."""
+    """Provide sample outline for testing (shared by the whole session, do not modify)."""
     return """# Perfect Outline
 
 ## I. Introduction
@@ -11,6 +11,11 @@ sys.path.insert(0, str(src_dir))
 
 from src.ai_services import GPTService, ClaudeService, AIOrchestrator
 
+# Response payloads shared by the length-control tests
+_TEXT_ON_TARGET = "A" * 5000
+_TEXT_TOO_SHORT = "A" * 1000
+_TEXT_NEAR_TARGET = "B" * 4800
+
 class TestGPTService:
     """Test cases for GPTService class."""
     
@@ -19,13 +24,12 @@ class TestGPTService:
         """Create GPTService instance for testing."""
         return GPTService()
     
-    @pytest.mark.asyncio
     async def test_generate_outline_success(self, gpt_service):
         """Test successful outline generation."""
         mock_response = MagicMock()
         mock_response.choices[0].message.content = "Test outline content"
         
-        with patch.object(gpt_service.client.chat.completions, 'create', return_value=mock_response) as mock_create:
+        with patch.object(gpt_service.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_response) as mock_create:
             result = await gpt_service.generate_outline("Test text", "Test prompt")
             
             assert result == "Test outline content"
@@ -38,23 +42,21 @@ class TestGPTService:
             assert "Test text" in call_args[1]['messages'][1]['content']
             assert "Test prompt" in call_args[1]['messages'][1]['content']
     
-    @pytest.mark.asyncio
     async def test_generate_outline_no_custom_prompt(self, gpt_service):
         """Test outline generation without custom prompt."""
         mock_response = MagicMock()
         mock_response.choices[0].message.content = "Test outline content"
         
-        with patch.object(gpt_service.client.chat.completions, 'create', return_value=mock_response) as mock_create:
+        with patch.object(gpt_service.client.chat.completions, 'create', new_callable=AsyncMock, return_value=mock_response) as mock_create:
             result = await gpt_service.generate_outline("Test text")
             
             assert result == "Test outline content"
             call_args = mock_create.call_args
             assert "No additional instructions" in call_args[1]['messages'][1]['content']
     
-    @pytest.mark.asyncio
     async def test_generate_outline_api_error(self, gpt_service):
         """Test error handling for API failures."""
-        with patch.object(gpt_service.client.chat.completions, 'create', side_effect=Exception("API Error")):
+        with patch.object(gpt_service.client.chat.completions, 'create', new_callable=AsyncMock, side_effect=Exception("API Error")):
             with pytest.raises(Exception, match="Failed to generate outline"):
                 await gpt_service.generate_outline("Test text")
 
@@ -66,13 +68,18 @@ class TestClaudeService:
         """Create ClaudeService instance for testing."""
         return ClaudeService()
     
-    @pytest.mark.asyncio
-    async def test_process_outline_success(self, claude_service):
+    @pytest.fixture
+    def claude_response_factory(self):
+        """Build a Claude messages.create response carrying the given text."""
+        def make(text):
+            return MagicMock(content=[MagicMock(text=text)])
+        return make
+    
+    async def test_process_outline_success(self, claude_service, claude_response_factory):
         """Test successful outline processing."""
-        mock_response = MagicMock()
-        mock_response.content[0].text = "Processed text content"
+        mock_response = claude_response_factory("Processed text content")
         
-        with patch.object(claude_service.client.messages, 'create', return_value=mock_response) as mock_create:
+        with patch.object(claude_service.client.messages, 'create', new_callable=AsyncMock, return_value=mock_response) as mock_create:
             result = await claude_service.process_outline("Test outline", 1000)
             
             assert result == "Processed text content"
@@ -85,17 +92,15 @@ class TestClaudeService:
             assert "Test outline" in call_args[1]['messages'][0]['content']
             assert "1000 characters" in call_args[1]['system']
     
-    @pytest.mark.asyncio
-    async def test_process_outline_with_progress_callback(self, claude_service):
+    async def test_process_outline_with_progress_callback(self, claude_service, claude_response_factory):
         """Test outline processing with progress callback."""
-        mock_response = MagicMock()
-        mock_response.content[0].text = "Processed text content"
+        mock_response = claude_response_factory("Processed text content")
         
         progress_callback = AsyncMock()
         
-        with patch.object(claude_service.client.messages, 'create', return_value=mock_response):
+        with patch.object(claude_service.client.messages, 'create', new_callable=AsyncMock, return_value=mock_response):
             result = await claude_service.process_outline(
-                "Test outline", 1000, progress_callback
+                "Test outline", 1000, progress_callback=progress_callback
             )
             
             assert result == "Processed text content"
@@ -103,69 +108,61 @@ class TestClaudeService:
             progress_callback.assert_any_call("Starting text generation...")
             progress_callback.assert_any_call("Text generation completed!")
     
-    @pytest.mark.asyncio
     async def test_process_outline_api_error(self, claude_service):
         """Test error handling for API failures."""
-        with patch.object(claude_service.client.messages, 'create', side_effect=Exception("API Error")):
+        with patch.object(claude_service.client.messages, 'create', new_callable=AsyncMock, side_effect=Exception("API Error")):
             with pytest.raises(Exception, match="Failed to process text"):
                 await claude_service.process_outline("Test outline")
     
-    @pytest.mark.asyncio
-    async def test_process_with_length_control_no_adjustment(self, claude_service):
+    async def test_process_with_length_control_no_adjustment(self, claude_service, claude_response_factory):
         """Test length control when no adjustment is needed."""
-        mock_response = MagicMock()
-        mock_response.content[0].text = "A" * 5000  # Exactly target length
+        mock_response = claude_response_factory(_TEXT_ON_TARGET)  # Exactly target length
         
         progress_callback = AsyncMock()
         
-        with patch.object(claude_service.client.messages, 'create', return_value=mock_response):
+        with patch.object(claude_service.client.messages, 'create', new_callable=AsyncMock, return_value=mock_response):
             result = await claude_service.process_with_length_control(
-                "Test outline", 5000, progress_callback
+                "Test outline", 5000, progress_callback=progress_callback
             )
             
-            assert len(result) == 5000
+            assert result == _TEXT_ON_TARGET
             # Should not call adjustment
             assert progress_callback.call_count == 2
     
-    @pytest.mark.asyncio
-    async def test_process_with_length_control_with_adjustment(self, claude_service):
+    async def test_process_with_length_control_with_adjustment(self, claude_service, claude_response_factory):
         """Test length control when adjustment is needed."""
         # First call returns text that's too short
-        mock_response1 = MagicMock()
-        mock_response1.content[0].text = "A" * 1000  # Too short
+        mock_response1 = claude_response_factory(_TEXT_TOO_SHORT)  # Too short
         
         # Second call (adjustment) returns better length
-        mock_response2 = MagicMock()
-        mock_response2.content[0].text = "B" * 4800  # Close to target
+        mock_response2 = claude_response_factory(_TEXT_NEAR_TARGET)  # Close to target
         
         progress_callback = AsyncMock()
         
-        with patch.object(claude_service.client.messages, 'create', side_effect=[mock_response1, mock_response2]):
+        with patch.object(claude_service.client.messages, 'create', new_callable=AsyncMock, side_effect=[mock_response1, mock_response2]):
             result = await claude_service.process_with_length_control(
-                "Test outline", 5000, progress_callback
+                "Test outline", 5000, progress_callback=progress_callback
             )
             
-            assert len(result) == 4800
-            assert progress_callback.call_count == 4  # 2 for initial + 2 for adjustment
+            assert result == _TEXT_NEAR_TARGET
+            assert progress_callback.call_count == 3  # start + adjustment start + adjustment completed
     
-    @pytest.mark.asyncio
-    async def test_process_with_length_control_adjustment_fails(self, claude_service):
+    async def test_process_with_length_control_adjustment_fails(self, claude_service, claude_response_factory):
         """Test length control when adjustment fails."""
-        mock_response1 = MagicMock()
-        mock_response1.content[0].text = "A" * 1000  # Too short
+        mock_response1 = claude_response_factory(_TEXT_TOO_SHORT)  # Too short
         
         progress_callback = AsyncMock()
         
-        with patch.object(claude_service.client.messages, 'create', side_effect=[
+        with patch.object(claude_service.client.messages, 'create', new_callable=AsyncMock, side_effect=[
             mock_response1, 
             Exception("Adjustment failed")
         ]):
             result = await claude_service.process_with_length_control(
-                "Test outline", 5000, progress_callback
+                "Test outline", 5000, progress_callback=progress_callback
             )
             
             # Should return original result when adjustment fails
-            assert len(result) == 1000
+            assert result == _TEXT_TOO_SHORT
 
 class TestAIOrchestrator:
     """Test cases for AIOrchestrator class."""
@@ -175,13 +172,12 @@ class TestAIOrchestrator:
         """Create AIOrchestrator instance for testing."""
         return AIOrchestrator()
     
-    @pytest.mark.asyncio
     async def test_process_text_workflow_success(self, orchestrator):
         """Test successful complete workflow."""
         # Mock GPT service
-        with patch.object(orchestrator.gpt_service, 'generate_outline', return_value="Test outline") as mock_gpt:
+        with patch.object(orchestrator.gpt_service, 'generate_outline', new_callable=AsyncMock, return_value="Test outline") as mock_gpt:
             # Mock Claude service
-            with patch.object(orchestrator.claude_service, 'process_with_length_control', return_value="Final text") as mock_claude:
+            with patch.object(orchestrator.claude_service, 'process_with_length_control', new_callable=AsyncMock, return_value="Final text") as mock_claude:
                 progress_callback = AsyncMock()
                 
                 result = await orchestrator.process_text_workflow(
@@ -200,26 +196,23 @@ class TestAIOrchestrator:
                 # Verify progress callbacks
                 assert progress_callback.call_count >= 3
     
-    @pytest.mark.asyncio
     async def test_process_text_workflow_gpt_failure(self, orchestrator):
         """Test workflow failure at GPT stage."""
-        with patch.object(orchestrator.gpt_service, 'generate_outline', side_effect=Exception("GPT Error")):
+        with patch.object(orchestrator.gpt_service, 'generate_outline', new_callable=AsyncMock, side_effect=Exception("GPT Error")):
             with pytest.raises(Exception, match="Workflow failed"):
                 await orchestrator.process_text_workflow("Test text")
     
-    @pytest.mark.asyncio
     async def test_process_text_workflow_claude_failure(self, orchestrator):
         """Test workflow failure at Claude stage."""
-        with patch.object(orchestrator.gpt_service, 'generate_outline', return_value="Test outline"):
-            with patch.object(orchestrator.claude_service, 'process_with_length_control', side_effect=Exception("Claude Error")):
+        with patch.object(orchestrator.gpt_service, 'generate_outline', new_callable=AsyncMock, return_value="Test outline"):
+            with patch.object(orchestrator.claude_service, 'process_with_length_control', new_callable=AsyncMock, side_effect=Exception("Claude Error")):
                 with pytest.raises(Exception, match="Workflow failed"):
                     await orchestrator.process_text_workflow("Test text")
     
-    @pytest.mark.asyncio
     async def test_process_text_workflow_default_parameters(self, orchestrator):
         """Test workflow with default parameters."""
-        with patch.object(orchestrator.gpt_service, 'generate_outline', return_value="Test outline") as mock_gpt:
-            with patch.object(orchestrator.claude_service, 'process_with_length_control', return_value="Final text") as mock_claude:
+        with patch.object(orchestrator.gpt_service, 'generate_outline', new_callable=AsyncMock, return_value="Test outline") as mock_gpt:
+            with patch.object(orchestrator.claude_service, 'process_with_length_control', new_callable=AsyncMock, return_value="Final text") as mock_claude:
                 
                 result = await orchestrator.process_text_workflow("Test text")
                 